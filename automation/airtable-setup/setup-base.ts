@@ -141,6 +141,7 @@ function buildTableSchema(): AirtableTableSchema {
             { name: 'LinkedIn' },
             { name: 'Instagram' },
             { name: 'Facebook' },
+            { name: 'TikTok' },
             { name: 'X/Twitter' }
           ]
         }
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Shared Airtable REST client for the automation scripts.
+
+One keep-alive requests.Session with a sized connection pool is reused for
+every call in a run, so the migration and cleanup scripts stop paying a TLS
+handshake per request. Pagination, 10-record batching and error handling live
+here instead of being copied into each script. Every request goes through a
+shared RateController (airtable_ratelimit.py) that paces, retries 429/5xx
+responses and adapts concurrency to observed throttling, and is recorded in
+client.metrics (airtable_metrics.py) for the end-of-run report.
+
+Usage:
+    from airtable_client import AirtableClient, AirtableError
+
+    client = AirtableClient.from_env()
+    records = client.get_all_records(table_id)
+    client.create_records(table_id, [{"Name": "..."}])
+
+    # Many batches: dispatched from a thread pool under the base's rate limit
+    for result in client.create_records_concurrent(table_id, fields_list):
+        ...
+
+    # Streaming: pages are prefetched in the background while the caller
+    # maps records and a writer flushes 10-record batches as they fill
+    # (shards=client.read_shards pages a large table as parallel partitions)
+    writer = client.create_writer()
+    for record in client.iter_records(table_id):
+        for result in writer.add(target_table_id, transform(record)):
+            ...
+    for result in writer.close():
+        ...
+"""
+
+import json
+import os
+import queue
+import string
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from airtable_metrics import RequestMetrics
+from airtable_records import Columns, CompactRecord
+from airtable_ratelimit import RETRY_STATUSES, RateController, parse_retry_after
+
+API_URL = "https://api.airtable.com/v0"
+
+# Airtable caps create/update/delete calls at 10 records and pages at 100
+MAX_BATCH_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+# Airtable allows 5 requests/second per base; RateController paces a margin
+# below whatever limit it's given (RATE_HEADROOM)
+DEFAULT_RATE_LIMIT = 5
+
+# Requests that may be retried after a read timeout without risking duplicates
+IDEMPOTENT_METHODS = {"GET", "PATCH", "DELETE"}
+
+# Responses after which Airtable hasn't applied a request, so even a plain
+# POST (create) can be resent; 500/502/504 may come after a commit
+UNAPPLIED_STATUSES = {429, 503}
+DEFAULT_WORKERS = 4
+
+# Pages fetched ahead of the consumer by iter_pages()
+DEFAULT_PREFETCH = 2
+
+# Partitions the scripts' large full-table reads opt into with
+# shards=client.read_shards (AIRTABLE_READ_SHARDS; 1 pages sequentially)
+DEFAULT_READ_SHARDS = 4
+
+# Characters an Airtable record id can end with, dealt out across record-id shards
+RECORD_ID_CHARS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+
+# Outcome of one batched write: the target table, the input items, the
+# records Airtable returned (None on failure) and the AirtableError if the
+# batch failed
+BatchResult = namedtuple("BatchResult", ["table_id", "items", "records", "error"])
+
+# Status Airtable uses when a record's contents are invalid (INVALID_VALUE_FOR_COLUMN,
+# UNKNOWN_FIELD_NAME, ...). Any other error would only fail every half of a
+# split batch the same way
+ISOLATABLE_STATUSES = {422}
+
+
+class AirtableError(Exception):
+    """Raised when Airtable returns an error response."""
+
+    def __init__(self, status_code, error):
+        self.status_code = status_code
+        self.error = error
+        super().__init__(f"{status_code}: {error}")
+
+
+def isolatable(error):
+    """True when Airtable rejected a batch for its contents (422), so bisecting it can find the bad records."""
+    return error.status_code in ISOLATABLE_STATUSES
+
+
+def unapplied(error):
+    """True when Airtable certainly didn't apply the failed request: it answered 4xx, 429 or 503."""
+    status = error.status_code
+    return status is not None and (400 <= status < 500 or status in UNAPPLIED_STATUSES)
+
+
+def connect_failed(error):
+    """True when a request failed while connecting, before its body could reach Airtable."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def sink(dead_letter, *args):
+    """A writer's dead-letter callback from an optional DeadLetterLog."""
+    return None if dead_letter is None else dead_letter.sink(*args)
+
+
+def batched(items, size=MAX_BATCH_SIZE):
+    """Yield successive lists of at most `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def record_id_shards(count):
+    """`count` filterByFormula partitions covering every record, by the last character of its id."""
+    count = max(1, min(count, len(RECORD_ID_CHARS)))
+    return [f'REGEX_MATCH(RECORD_ID(), "[{RECORD_ID_CHARS[i::count]}]$")' for i in range(count)]
+
+
+def select_shards(field, values):
+    """One partition per select option, plus one for every other value (and blanks)."""
+    equals = [f"{{{field}}} = {json.dumps(value)}" for value in values]
+    return equals + [f"NOT(OR({', '.join(equals)}))"]
+
+
+def created_time_shards(boundaries):
+    """Partitions by CREATED_TIME() split at the sorted ISO dates in `boundaries`, open at both ends."""
+    before = [f"IS_BEFORE(CREATED_TIME(), DATETIME_PARSE({json.dumps(b)}))" for b in boundaries]
+    return ([before[0]]
+            + [f"AND(NOT({a}), {b})" for a, b in zip(before, before[1:])]
+            + [f"NOT({before[-1]})"])
+
+
+def shard_formulas(shards):
+    """Partition formulas for a shard count or list of formulas; None for an unsharded read."""
+    if isinstance(shards, int):
+        shards = record_id_shards(shards) if shards > 1 else None
+    return shards or None
+
+
+def pump(sources, buffer):
+    """
+    Drain iterators in background threads, yielding their items in arrival
+    order. At most `buffer` items are held ahead of the consumer; an
+    exception in a source is re-raised here, and closing the generator
+    stops the threads.
+    """
+    items = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(source):
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    for source in sources:
+        threading.Thread(target=drain, args=(source,), daemon=True).start()
+
+    try:
+        remaining = len(sources)
+        while remaining:
+            item = items.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+
+
+def clean_fields(fields):
+    """Drop None and empty-string values so Airtable doesn't reject them."""
+    return {k: v for k, v in fields.items() if v is not None and v != ""}
+
+
+def list_params(page_size=MAX_PAGE_SIZE, fields=None, formula=None):
+    """Query params for a list-records call; `fields=[]` asks for ids only."""
+    params = [("pageSize", page_size)]
+    if fields is not None:
+        params += [("fields[]", name) for name in fields] or [("fields[]", "")]
+    if formula:
+        params.append(("filterByFormula", formula))
+    return params
+
+
+class BatchWriter:
+    """
+    Buffers items per table and submits each full 10-record batch to a
+    bounded thread pool as soon as it fills.
+
+    `send(table_id, batch)` performs the request and returns the records
+    Airtable sent back. add() and close() return the BatchResults that
+    completed in the meantime, so callers can report progress while the
+    source is still being read: every call collects the batches that have
+    finished, and only waits when two batches per worker are in flight,
+    which keeps memory bounded regardless of input size.
+
+    When Airtable rejects a batch for its contents (one invalid record fails
+    all ten), the worker bisects it and resends the halves until the bad
+    records are isolated, so the good ones are still written. Each failed
+    part comes back as its own BatchResult, and its items are passed to
+    `dead_letter(table_id, items, error)` when given.
+    """
+
+    def __init__(self, send, max_workers=DEFAULT_WORKERS, dead_letter=None):
+        self.send = send
+        self.dead_letter = dead_letter
+        self.buffers = defaultdict(list)
+        self.pending = {}
+        self.max_pending = max_workers * 2
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def add(self, table_id, item):
+        """Queue one item for `table_id`. Returns completed BatchResults."""
+        buffer = self.buffers[table_id]
+        buffer.append(item)
+        if len(buffer) < MAX_BATCH_SIZE:
+            return self._ready()
+
+        self.buffers[table_id] = []
+        return self._submit(table_id, buffer)
+
+    def close(self):
+        """Flush partial batches, wait for everything in flight and return the results."""
+        results = []
+        for table_id, buffer in list(self.buffers.items()):
+            if buffer:
+                results += self._submit(table_id, buffer)
+        self.buffers.clear()
+
+        while self.pending:
+            results += self._drain()
+        self.pool.shutdown()
+        return results
+
+    def _send(self, table_id, batch):
+        """Send a batch, bisecting it on rejection. Returns [(items, records, error)] in item order."""
+        try:
+            return [(batch, self.send(table_id, batch), None)]
+        except AirtableError as e:
+            if len(batch) == 1 or not isolatable(e):
+                return [(batch, None, e)]
+        mid = len(batch) // 2
+        return self._send(table_id, batch[:mid]) + self._send(table_id, batch[mid:])
+
+    def _submit(self, table_id, batch):
+        future = self.pool.submit(self._send, table_id, batch)
+        self.pending[future] = (table_id, batch)
+        if len(self.pending) >= self.max_pending:
+            return self._drain()
+        return self._ready()
+
+    def _ready(self):
+        """Results of the batches that have finished, without waiting."""
+        return self._collect([future for future in self.pending if future.done()])
+
+    def _drain(self):
+        done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+        return self._collect(done)
+
+    def _collect(self, done):
+        results = []
+        for future in done:
+            table_id, _ = self.pending.pop(future)
+            for items, records, error in future.result():
+                results.append(BatchResult(table_id, items, records, error))
+                if error and self.dead_letter is not None:
+                    self.dead_letter(table_id, items, error)
+        return results
+
+
+class AirtableClient:
+    """Pooled, keep-alive client for a single Airtable base."""
+
+    def __init__(self, api_key, base_id, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 api_url=API_URL, rate_limit=DEFAULT_RATE_LIMIT, max_workers=DEFAULT_WORKERS,
+                 read_shards=DEFAULT_READ_SHARDS):
+        self.base_id = base_id
+        self.base_url = f"{api_url}/{base_id}"
+        self.timeout = timeout
+        self.rate = RateController(rate_limit, max_workers)
+        self.metrics = RequestMetrics()
+        self.max_workers = max_workers
+        self.read_shards = read_shards
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a client from AIRTABLE_API_KEY / AIRTABLE_BASE_ID."""
+        kwargs.setdefault("api_url", os.getenv("AIRTABLE_API_URL", API_URL))
+        kwargs.setdefault("rate_limit", float(os.getenv("AIRTABLE_RATE_LIMIT", DEFAULT_RATE_LIMIT)))
+        kwargs.setdefault("max_workers", int(os.getenv("AIRTABLE_MAX_WORKERS", DEFAULT_WORKERS)))
+        kwargs.setdefault("read_shards", int(os.getenv("AIRTABLE_READ_SHARDS", DEFAULT_READ_SHARDS)))
+        return cls(os.getenv("AIRTABLE_API_KEY"), os.getenv("AIRTABLE_BASE_ID"), **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Low-level request
+    # ------------------------------------------------------------------
+
+    def request(self, method, path, params=None, json=None):
+        """
+        Send a request relative to the base URL and return the decoded body.
+
+        Idempotent requests (GET, PATCH, DELETE and upserts) are retried
+        with the rate controller's backoff (honoring Retry-After) on 429 and
+        5xx responses, connection failures and timeouts. A plain POST may
+        already have created its records once the body is sent, so it is
+        only retried on 429/503 or when connecting failed. Raises
+        AirtableError once retries are exhausted.
+        """
+        replayable = method in IDEMPOTENT_METHODS or bool((json or {}).get("performUpsert"))
+        retry_statuses = RETRY_STATUSES if replayable else UNAPPLIED_STATUSES
+        attempt = 0
+
+        while True:
+            self.rate.acquire()
+            started = time.monotonic()
+            response = error = None
+            try:
+                response = self.session.request(
+                    method,
+                    f"{self.base_url}/{path}",
+                    params=params,
+                    json=json,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                # Hand the slot back whatever happened, or the window shrinks for good
+                if response is None:
+                    self.rate.release(ok=False)
+                else:
+                    self.rate.release(throttled=response.status_code == 429,
+                                      retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                                      ok=response.status_code < 500)
+
+            latency = time.monotonic() - started
+            if error is not None:
+                self.metrics.observe(method, None, latency, 0, 0)
+                retryable = replayable or connect_failed(error)
+                if not retryable or attempt >= self.rate.max_retries:
+                    raise AirtableError(None, str(error)) from error
+                self.metrics.observe_retry()
+                time.sleep(self.rate.backoff(attempt))
+                attempt += 1
+                continue
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code in retry_statuses and attempt < self.rate.max_retries:
+                self._observe(response, latency)
+                self.metrics.observe_retry()
+                time.sleep(self.rate.backoff(attempt, retry_after))
+                attempt += 1
+                continue
+            break
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"error": response.text}
+
+        if response.status_code >= 400 or "error" in data:
+            self._observe(response, latency)
+            raise AirtableError(response.status_code, data.get("error", data))
+
+        self._observe(response, latency, len(data.get("records", [])) if "records" in data else 1)
+        return data
+
+    def _observe(self, response, latency, records=0):
+        sent = len(response.request.url) + len(response.request.body or b"")
+        self.metrics.observe(response.request.method, response.status_code, latency,
+                             sent, len(response.content), records)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def iter_pages(self, table_id, page_size=MAX_PAGE_SIZE, prefetch=DEFAULT_PREFETCH,
+                   fields=None, formula=None, shards=None):
+        """
+        Yield each page of records, following `offset` until exhausted.
+
+        `fields` projects the response onto the named fields (an empty list
+        returns ids only) and `formula` is passed as filterByFormula, so
+        Airtable only sends the rows and columns the caller needs.
+
+        With `prefetch` > 0 a background thread requests the next page while
+        the caller is still working on the current one; at most `prefetch`
+        pages are held ahead of the consumer.
+
+        Pagination is sequential (each page needs the previous one's offset),
+        so large reads can opt into disjoint partitions instead: `shards` is
+        a count of record-id partitions (the scripts pass client.read_shards)
+        or a list of partition formulas (select_shards, created_time_shards).
+        Each partition is paged in its own thread under the shared rate
+        controller and pages are yielded as they arrive, so records don't
+        come back in table order. The first page is read unpartitioned, so
+        small tables still take one request, and its records are skipped in
+        the partitions. Beyond that, deduplication is best-effort: like any
+        paged read, an edit that moves a record between partitions mid-read
+        can return it twice or not at all.
+        """
+        shards = shard_formulas(shards)
+        if not shards:
+            if not prefetch:
+                yield from self._fetch_pages(table_id, page_size, fields, formula)
+            else:
+                yield from pump([self._fetch_pages(table_id, page_size, fields, formula)], prefetch)
+            return
+
+        # A table that fits in one page needs no partitions
+        data = self.request("GET", table_id, params=list_params(page_size, fields, formula))
+        first = data.get("records", [])
+        yield first
+        if not data.get("offset"):
+            return
+
+        # Only the first page's ids are kept, so memory stays bounded to a few pages
+        seen = {record["id"] for record in first}
+        partitions = [self._fetch_pages(table_id, page_size, fields, f"AND({formula}, {shard})" if formula else shard)
+                      for shard in shards]
+        for page in pump(partitions, max(prefetch, 1) * len(partitions)):
+            fresh = [record for record in page if record["id"] not in seen]
+            if fresh:
+                yield fresh
+
+    def _fetch_pages(self, table_id, page_size, fields=None, formula=None):
+        params = list_params(page_size, fields, formula)
+
+        while True:
+            data = self.request("GET", table_id, params=params)
+            yield data.get("records", [])
+
+            offset = data.get("offset")
+            if not offset:
+                break
+            params = list_params(page_size, fields, formula) + [("offset", offset)]
+
+    def iter_records(self, table_id, page_size=MAX_PAGE_SIZE, prefetch=DEFAULT_PREFETCH,
+                     fields=None, formula=None, compact=False, shards=None):
+        """
+        Yield records one at a time as their pages arrive. With `compact`,
+        yields CompactRecords (airtable_records.py) sharing one column layout.
+        """
+        columns = Columns(fields or ()) if compact else None
+        for page in self.iter_pages(table_id, page_size=page_size, prefetch=prefetch,
+                                    fields=fields, formula=formula, shards=shards):
+            if compact:
+                yield from (CompactRecord.from_api(record, columns) for record in page)
+            else:
+                yield from page
+
+    def get_all_records(self, table_id, page_size=MAX_PAGE_SIZE, fields=None, formula=None, compact=False,
+                        shards=None):
+        """Fetch all records from a table, as CompactRecords with `compact`."""
+        return list(self.iter_records(table_id, page_size=page_size, fields=fields,
+                                      formula=formula, compact=compact, shards=shards))
+
+    # ------------------------------------------------------------------
+    # Writes (batched to Airtable's 10-record limit)
+    # ------------------------------------------------------------------
+
+    def create_records(self, table_id, fields_list):
+        """Create records from a list of field dicts. Returns created records."""
+        created = []
+        for batch in batched(fields_list):
+            created.extend(self._create_batch(table_id, batch))
+        return created
+
+    def update_records(self, table_id, updates):
+        """PATCH records from a list of {"id", "fields"} dicts. Returns updated records."""
+        updated = []
+        for batch in batched(updates):
+            updated.extend(self._update_batch(table_id, batch))
+        return updated
+
+    def delete_records(self, table_id, record_ids):
+        """Delete records by id. Returns the ids Airtable confirmed deleted."""
+        deleted = []
+        for batch in batched(record_ids):
+            deleted.extend(r["id"] for r in self._delete_batch(table_id, batch) if r.get("deleted"))
+        return deleted
+
+    def _create_batch(self, table_id, batch):
+        data = self.request("POST", table_id, json={
+            "records": [{"fields": clean_fields(f)} for f in batch],
+        })
+        return data.get("records", [])
+
+    def _update_batch(self, table_id, batch):
+        data = self.request("PATCH", table_id, json={
+            "records": [{"id": u["id"], "fields": u["fields"]} for u in batch],
+        })
+        return data.get("records", [])
+
+    def _delete_batch(self, table_id, batch):
+        data = self.request("DELETE", table_id, params=[("records[]", rid) for rid in batch])
+        return data.get("records", [])
+
+    def _create_keyed_batch(self, table_id, batch):
+        return self._create_batch(table_id, [fields for _, fields in batch])
+
+    def _upsert_batch(self, table_id, batch, merge_on):
+        records = []
+        for item in batch:
+            record = {"fields": clean_fields(item["fields"])}
+            if item.get("id"):
+                record["id"] = item["id"]
+            records.append(record)
+        data = self.request("PATCH", table_id, json={
+            "performUpsert": {"fieldsToMergeOn": merge_on},
+            "records": records,
+        })
+        return data.get("records", [])
+
+    def create_writer(self, max_workers=None, keyed=False, dead_letter=None):
+        """
+        BatchWriter that creates records from field dicts. With `keyed`, items
+        are (key, fields) pairs and results keep the keys, in request order,
+        so callers can map each created record back to its source.
+
+        Every writer takes an optional DeadLetterLog (airtable_deadletter.py)
+        that records the items of failed batches for a later replay.
+        """
+        send = self._create_keyed_batch if keyed else self._create_batch
+        return BatchWriter(send, max_workers or self.max_workers,
+                           sink(dead_letter, "create", keyed))
+
+    def update_writer(self, max_workers=None, dead_letter=None):
+        """BatchWriter that PATCHes {"id", "fields"} updates."""
+        return BatchWriter(self._update_batch, max_workers or self.max_workers,
+                           sink(dead_letter, "update"))
+
+    def upsert_writer(self, merge_on, max_workers=None, keyed=False, dead_letter=None):
+        """
+        BatchWriter that upserts {"fields"} items with performUpsert. Items
+        with an "id" update that record; the rest update the record whose
+        `merge_on` fields match, or create one if none does. With `keyed`,
+        items are (key, item) pairs as for create_writer().
+        """
+        if keyed:
+            def send(table_id, batch):
+                return self._upsert_batch(table_id, [item for _, item in batch], merge_on)
+        else:
+            def send(table_id, batch):
+                return self._upsert_batch(table_id, batch, merge_on)
+        return BatchWriter(send, max_workers or self.max_workers,
+                           sink(dead_letter, "upsert", keyed, merge_on))
+
+    def delete_writer(self, max_workers=None, dead_letter=None):
+        """BatchWriter that deletes record ids."""
+        return BatchWriter(self._delete_batch, max_workers or self.max_workers,
+                           sink(dead_letter, "delete"))
+
+    def run_batches(self, writer, table_id, items):
+        """Feed `items` through `writer` for one table, yielding each BatchResult as it completes."""
+        for item in items:
+            yield from writer.add(table_id, item)
+        yield from writer.close()
+
+    def create_records_concurrent(self, table_id, fields_list, max_workers=None):
+        """Create records in concurrent 10-record batches. Yields a BatchResult per batch."""
+        return self.run_batches(self.create_writer(max_workers), table_id, fields_list)
+
+    def update_records_concurrent(self, table_id, updates, max_workers=None):
+        """PATCH {"id", "fields"} updates in concurrent 10-record batches. Yields a BatchResult per batch."""
+        return self.run_batches(self.update_writer(max_workers), table_id, updates)
+
+    def delete_record(self, table_id, record_id):
+        """Delete a single record."""
+        return self.request("DELETE", f"{table_id}/{record_id}")
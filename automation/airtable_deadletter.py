@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Dead-letter log for records Airtable refused to write.
+
+BatchWriter bisects a rejected batch down to the records that caused it, so
+only those fail; with a DeadLetterLog attached (the writers' `dead_letter`
+argument) their items are appended to an NDJSON file, along with the write
+they belonged to and Airtable's error:
+
+    {"op": "create", "table": T, "keyed": true, "mergeOn": null,
+     "item": [source_id, {...}], "status": 422, "error": {...}}
+
+A create that failed with a 5xx or a network error may still have been
+applied by Airtable, so its entry is marked "possiblyApplied": true. Resending
+it blindly could duplicate the record.
+
+After fixing the data (or the table's options), replay_dead_letters() sends
+the items again through the same kind of writer. Possibly applied creates are
+only resent as upserts merging on `merge_on`, so a record that did land is
+updated rather than created twice; without `merge_on` they're kept in the file
+for a manual check (possibly_applied() counts them). Rows that fail again are
+written back to the file; the rest are removed from it.
+
+Usage:
+    dead_letters = DeadLetterLog.for_script("migrate-deal-posts", client.base_id)
+    writer = client.create_writer(keyed=True, dead_letter=dead_letters)
+    ...
+    for op, result in replay_dead_letters(client, dead_letters.path, merge_on=["Name"]):
+        ...
+"""
+
+import json
+import pathlib
+from collections import Counter
+
+from airtable_client import unapplied
+
+project_root = pathlib.Path(__file__).parent.parent
+DEAD_LETTER_DIR = project_root / ".cache" / "dead-letters"
+
+
+class DeadLetterLog:
+    """Append-only NDJSON file of failed write items, opened on first use."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.file = None
+        self.counts = Counter()
+
+    @classmethod
+    def for_script(cls, script_name, base_id):
+        return cls(DEAD_LETTER_DIR / f"{script_name}-{base_id}.ndjson")
+
+    def sink(self, op, keyed=False, merge_on=None):
+        """Callback for one writer: records its failed items under `op`."""
+        def add(table_id, items, error):
+            uncertain = op == "create" and not unapplied(error)
+            for item in items:
+                entry = {"op": op, "table": table_id, "keyed": keyed, "mergeOn": merge_on,
+                         "item": item, "status": error.status_code, "error": error.error}
+                if uncertain:
+                    entry["possiblyApplied"] = True
+                self.write(entry)
+        return add
+
+    def write(self, entry):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Append: earlier runs' dead letters stay until they're replayed
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        self.counts[entry["table"]] += 1
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def read_dead_letters(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def possibly_applied(path):
+    """Entries in a dead-letter file that may have been applied and weren't resent."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return 0
+    return sum(1 for entry in read_dead_letters(path) if entry.get("possiblyApplied"))
+
+
+def replay_dead_letters(client, path, max_workers=None, merge_on=None):
+    """
+    Resend every item in a dead-letter file with the writer it failed in.
+    Yields (op, BatchResult) as batches complete. Items that fail again
+    replace the file's contents once the replay finishes.
+
+    Possibly applied creates are sent as upserts merging on `merge_on`
+    instead; without it they stay in the file unsent.
+    """
+    path = pathlib.Path(path)
+    entries = read_dead_letters(path)
+    retry = DeadLetterLog(path.with_name(path.name + ".tmp"))
+    writers = {}
+
+    for entry in entries:
+        op, keyed = entry["op"], entry["keyed"]
+        if entry.get("possiblyApplied"):
+            if not merge_on:
+                retry.write(entry)
+                continue
+            fields = entry["item"][1] if keyed else entry["item"]
+            item = [entry["item"][0], {"fields": fields}] if keyed else {"fields": fields}
+            entry = {**entry, "op": "upsert", "mergeOn": list(merge_on), "item": item}
+            op = "upsert"
+        merge_on_fields = tuple(entry.get("mergeOn") or ())
+        key = (op, keyed, merge_on_fields)
+        if key not in writers:
+            if op == "create":
+                writers[key] = client.create_writer(max_workers, keyed=keyed, dead_letter=retry)
+            elif op == "update":
+                writers[key] = client.update_writer(max_workers, dead_letter=retry)
+            elif op == "upsert":
+                writers[key] = client.upsert_writer(list(merge_on_fields), max_workers, keyed=keyed,
+                                                    dead_letter=retry)
+            elif op == "delete":
+                writers[key] = client.delete_writer(max_workers, dead_letter=retry)
+            else:
+                raise ValueError(f"Unknown dead-letter op {op!r}")
+
+        item = tuple(entry["item"]) if keyed else entry["item"]
+        for result in writers[key].add(entry["table"], item):
+            yield op, result
+
+    for (op, _, _), writer in writers.items():
+        for result in writer.close():
+            yield op, result
+
+    retry.close()
+    if len(retry):
+        retry.path.replace(path)
+    else:
+        path.unlink()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for Airtable migrations.
+
+Each successfully written batch appends one NDJSON line per record mapping
+the source record id to the record it produced, then flushes and fsyncs
+before the next batch is reported. A migration that dies halfway can be
+re-run with --resume: everything already in the journal is skipped, so
+nothing is created twice. Opening a non-empty journal without resume raises
+FileExistsError unless fresh=True, which moves the old journal aside
+(<name>.<timestamp>.ndjson) rather than truncating it.
+
+Usage:
+    from airtable_journal import MigrationJournal
+
+    with MigrationJournal.for_script("migrate-deal-posts", base_id, resume=True) as journal:
+        if source_id in journal:
+            ...  # already migrated
+        journal.record_batch(table_id, [(source_id, created_id), ...])
+
+Batches still in flight when the process dies are not journaled; at most the
+writer's in-flight window (two batches per worker) may need checking by hand.
+"""
+
+import json
+import os
+import pathlib
+import time
+
+project_root = pathlib.Path(__file__).parent.parent
+JOURNAL_DIR = project_root / ".cache" / "journals"
+
+
+class MigrationJournal:
+    """Source-id → created-id journal backed by an fsync'd NDJSON file."""
+
+    def __init__(self, path, resume=False, fresh=False):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not resume and self.path.exists() and self.path.stat().st_size:
+            # Truncating would lose the only record of what an unfinished run created
+            if not fresh:
+                raise FileExistsError(f"{self.path} holds checkpoints from an earlier run")
+            self.path.rename(self.path.with_suffix(f".{time.strftime('%Y%m%d-%H%M%S')}.ndjson"))
+        self.completed = self._load() if resume else {}
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def for_script(cls, script_name, base_id, resume=False, fresh=False):
+        return cls(JOURNAL_DIR / f"{script_name}-{base_id}.ndjson", resume=resume, fresh=fresh)
+
+    def _load(self):
+        completed = {}
+        if not self.path.exists():
+            return completed
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    continue
+                completed[entry["source"]] = entry["target"]
+        return completed
+
+    def __contains__(self, source_id):
+        return source_id in self.completed
+
+    def __len__(self):
+        return len(self.completed)
+
+    def record_batch(self, table_id, pairs):
+        """Durably append (source_id, target_id) pairs for one written batch."""
+        for source_id, target_id in pairs:
+            self.file.write(json.dumps({"source": source_id, "target": target_id, "table": table_id}) + "\n")
+            self.completed[source_id] = target_id
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
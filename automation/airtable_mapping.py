@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Declarative field mappings for the Airtable migration scripts.
+
+config/airtable.json "mappings" describe how each target table's fields are
+built from a source record. load_mapping() compiles one spec into Python
+once, up front, so the per-record work is a single dict display rather than
+re-reading the spec or rebuilding lookup tables. Mappers take a whole page
+of source field dicts per call.
+
+Mapping spec:
+    {
+      "table": "commercialDeals",   # key in "tables": target names and defaults are checked against it
+      "fillMissing": false,         # true: only emit fields that are blank in the source record
+      "fields": {
+        "<target field>": {<field rule>}, ...
+      }
+    }
+
+Field rule keys (all optional):
+    from      source field name; without it the field is a constant
+    value     constant value
+    first     take the first element of a list (multiselect) value
+    map       name of a lookup rule table; values not in it get `default`
+    tiers     name of a [(threshold, label), ...] rule table; the label of the
+              highest threshold <= the value (blank counts as 0)
+    ifBlank   [{"match": {field: value}, "value": v}, ...] tried in order when
+              the source value is blank, before `default`
+    default   fallback; when omitted, the schema field's "default" is used
+
+Rule tables are passed in by the script (they stay next to the code that
+customises them), e.g.:
+
+    mapper = load_mapping("commercialDeals", rules={"propertyMap": COMMERCIAL_PROPERTY_MAP, ...})
+    mapped = mapper.map_page([record["fields"] for record in page])
+"""
+
+import json
+import pathlib
+
+project_root = pathlib.Path(__file__).parent.parent
+CONFIG_PATH = project_root / "config" / "airtable.json"
+
+MISSING = object()
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tiers_expression(i, table, value_expr, namespace):
+    """
+    Inline a [(threshold, label)] rule table as a conditional chain: the label
+    of the highest threshold <= the value (blank counts as 0), or the lowest
+    label when the value is below every threshold.
+    """
+    ordered = sorted(table, key=lambda tier: tier[0], reverse=True)
+    expr = f"_t{i}_{len(ordered) - 1}"
+    for j, (threshold, label) in enumerate(ordered):
+        namespace[f"_t{i}_{j}"] = label
+        namespace[f"_th{i}_{j}"] = threshold
+    for j in reversed(range(len(ordered) - 1)):
+        value = f"(_v := {value_expr} or 0)" if j == 0 else "_v"
+        expr = f"_t{i}_{j} if {value} >= _th{i}_{j} else {expr}"
+    return f"({expr})"
+
+
+def compile_if_blank(cases, fallback):
+    """Compile ifBlank cases into a fields -> value function."""
+    cases = [(tuple(case["match"].items()), case["value"]) for case in cases]
+
+    def if_blank(fields):
+        for match, result in cases:
+            if all(fields.get(k) == v for k, v in match):
+                return result
+        return fallback
+
+    return if_blank
+
+
+def first(value):
+    return value[0] if isinstance(value, (list, tuple)) and value else None
+
+
+def field_expression(i, target, rule, rules, schema_field, namespace):
+    """
+    Python source for one target field, evaluated with the source dict bound
+    to `fields`. Constants and rule tables are bound into `namespace`.
+    """
+    default = rule.get("default", (schema_field or {}).get("default", MISSING))
+
+    if "from" not in rule:
+        value = rule.get("value", default)
+        if value is MISSING:
+            raise ValueError(f"{target}: needs 'from', 'value' or a schema default")
+        namespace[f"_c{i}"] = value
+        return f"_c{i}"
+
+    namespace[f"_d{i}"] = None if default is MISSING else default
+    transformed = rule.get("first") or "map" in rule or "tiers" in rule or "ifBlank" in rule
+    if not transformed:
+        # Plain copy: the hot path for most fields
+        return f"fields.get({rule['from']!r}, _d{i})"
+
+    expr = f"fields.get({rule['from']!r})"
+    if rule.get("first"):
+        expr = f"_first({expr})"
+
+    for key in ("map", "tiers"):
+        if key in rule and rule[key] not in rules:
+            raise ValueError(f"{target}: unknown rule table {rule[key]!r}")
+    if "map" in rule:
+        namespace[f"_m{i}"] = rules[rule["map"]]
+        expr = f"_m{i}.get({expr}, _d{i})"
+    if "tiers" in rule:
+        expr = tiers_expression(i, rules[rule["tiers"]], expr, namespace)
+    if "ifBlank" in rule:
+        namespace[f"_b{i}"] = compile_if_blank(rule["ifBlank"], namespace[f"_d{i}"])
+        expr = f"({expr} or _b{i}(fields))"
+
+    return expr
+
+
+class FieldMapper:
+    """
+    A compiled mapping spec: maps source field dicts to target field dicts.
+
+    The spec is turned into Python source for a single dict display (or, with
+    fillMissing, a run of guarded assignments) and compiled once, so mapping a
+    record costs about what the equivalent hand-written function would.
+    """
+
+    def __init__(self, name, spec, rules=None, tables=None):
+        self.name = name
+        self.fill_missing = spec.get("fillMissing", False)
+
+        schema = {}
+        if spec.get("table"):
+            table = (tables or {}).get(spec["table"])
+            if table is None:
+                raise ValueError(f"mapping {name!r}: unknown table {spec['table']!r}")
+            schema = {f["name"]: f for f in table["fields"].values()}
+
+        namespace = {"_first": first}
+        expressions = []
+        for i, (target, rule) in enumerate(spec["fields"].items()):
+            if schema and target not in schema:
+                raise ValueError(f"mapping {name!r}: {target!r} is not a field of {spec['table']!r}")
+            expressions.append((target, field_expression(i, target, rule, rules or {}, schema.get(target), namespace)))
+
+        self.fields = [target for target, _ in expressions]
+        self.source = self.generate(expressions)
+        exec(compile(self.source, f"<mapping {name}>", "exec"), namespace)
+        self.map = namespace["map_fields"]
+        self.map_page = namespace["map_page"]
+
+    def generate(self, expressions):
+        """Source for map_fields(fields) and map_page(page)."""
+        if self.fill_missing:
+            body = "\n".join(f"    if not fields.get({t!r}):\n        out[{t!r}] = {e}" for t, e in expressions)
+            return (f"def map_fields(fields):\n    out = {{}}\n{body}\n    return out\n\n"
+                    "def map_page(page):\n    return [map_fields(fields) for fields in page]\n")
+
+        display = "{" + ", ".join(f"{t!r}: {e}" for t, e in expressions) + "}"
+        return (f"def map_fields(fields):\n    return {display}\n\n"
+                f"def map_page(page):\n    return [{display} for fields in page]\n")
+
+
+def load_mapping(name, rules=None, config=None):
+    """Compile the named mapping from config/airtable.json."""
+    config = config or load_config()
+    spec = config.get("mappings", {}).get(name)
+    if spec is None:
+        raise ValueError(f"No mapping named {name!r} in {CONFIG_PATH}")
+    return FieldMapper(name, spec, rules, config.get("tables"))
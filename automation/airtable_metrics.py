@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Per-request metrics for the Airtable automation scripts.
+
+AirtableClient records every HTTP attempt here: method, status, latency,
+bytes sent/received and records carried. At the end of a run each script
+calls emit(), which
+
+- appends a JSON summary line to .cache/metrics/airtable-runs.ndjson
+  (override with AIRTABLE_METRICS_LOG) so records/sec per script can be
+  tracked over time
+- writes an OpenMetrics textfile to $AIRTABLE_METRICS_TEXTFILE_DIR/airtable_<script>.prom
+  when that variable is set, for the node exporter textfile collector
+- prints a one-line summary
+
+The summary also carries the records the script couldn't write (errors) and
+the rows validation quarantined, so callers such as migrate-fleet.py can
+tell a partial run from a clean one without parsing its output.
+
+Usage:
+    client = AirtableClient.from_env()
+    ...
+    client.metrics.emit("migrate-deal-posts", records=processed, errors=len(failed),
+                        quarantined=len(quarantine))
+"""
+
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+project_root = pathlib.Path(__file__).parent.parent
+DEFAULT_LOG = project_root / ".cache" / "metrics" / "airtable-runs.ndjson"
+
+# Latency histogram upper bounds in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Thread-safe counters and latency histogram for one client's requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.records = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.throttled = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def observe(self, method, status, latency, bytes_sent, bytes_received, records=0):
+        """Record one HTTP attempt (status None for connection failures)."""
+        with self.lock:
+            self.requests[method] += 1
+            self.statuses[status or "error"] += 1
+            self.records[method] += records
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+            if status == 429:
+                self.throttled += 1
+
+            self.latency_sum += latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def observe_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def summary(self, script, records=None, errors=None, quarantined=None):
+        """Snapshot as a JSON-serialisable dict."""
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            total = sum(self.requests.values())
+            return {
+                "script": script,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "elapsed_seconds": round(elapsed, 3),
+                "records": records,
+                "records_per_sec": round(records / elapsed, 2) if records and elapsed else None,
+                "errors": errors,
+                "quarantined": quarantined,
+                "requests": dict(self.requests),
+                "total_requests": total,
+                "records_per_request": {
+                    method: round(self.records[method] / count, 2)
+                    for method, count in self.requests.items() if count
+                },
+                "statuses": {str(k): v for k, v in self.statuses.items()},
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "latency_seconds": {
+                    "sum": round(self.latency_sum, 4),
+                    "mean": round(self.latency_sum / total, 4) if total else None,
+                    "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.buckets)),
+                },
+            }
+
+    def openmetrics(self, summary):
+        """Render a summary in OpenMetrics text format."""
+        script = summary["script"]
+        label = f'script="{script}"'
+        lines = [
+            "# TYPE airtable_run_records gauge",
+            f"airtable_run_records{{{label}}} {summary['records'] or 0}",
+            "# TYPE airtable_run_records_per_second gauge",
+            f"airtable_run_records_per_second{{{label}}} {summary['records_per_sec'] or 0}",
+            "# TYPE airtable_run_errors gauge",
+            f"airtable_run_errors{{{label}}} {summary['errors'] or 0}",
+            "# TYPE airtable_run_quarantined gauge",
+            f"airtable_run_quarantined{{{label}}} {summary['quarantined'] or 0}",
+            "# TYPE airtable_run_duration_seconds gauge",
+            f"airtable_run_duration_seconds{{{label}}} {summary['elapsed_seconds']}",
+            "# TYPE airtable_run_requests gauge",
+        ]
+        for method, count in summary["requests"].items():
+            lines.append(f'airtable_run_requests{{{label},method="{method}"}} {count}')
+        lines += [
+            "# TYPE airtable_run_bytes_sent gauge",
+            f"airtable_run_bytes_sent{{{label}}} {summary['bytes_sent']}",
+            "# TYPE airtable_run_bytes_received gauge",
+            f"airtable_run_bytes_received{{{label}}} {summary['bytes_received']}",
+            "# TYPE airtable_run_retries gauge",
+            f"airtable_run_retries{{{label}}} {summary['retries']}",
+            "# TYPE airtable_run_throttled gauge",
+            f"airtable_run_throttled{{{label}}} {summary['throttled']}",
+            "# TYPE airtable_request_duration_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in summary["latency_seconds"]["buckets"].items():
+            cumulative += count
+            lines.append(f'airtable_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines += [
+            f"airtable_request_duration_seconds_count{{{label}}} {summary['total_requests']}",
+            f"airtable_request_duration_seconds_sum{{{label}}} {summary['latency_seconds']['sum']}",
+            "# EOF",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def emit(self, script, records=None, errors=None, quarantined=None):
+        """Write the run summary (NDJSON log, optional textfile) and print a one-liner."""
+        summary = self.summary(script, records, errors, quarantined)
+
+        log_path = pathlib.Path(os.getenv("AIRTABLE_METRICS_LOG", DEFAULT_LOG))
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+
+        textfile_dir = os.getenv("AIRTABLE_METRICS_TEXTFILE_DIR")
+        if textfile_dir:
+            # Write-then-rename so the collector never reads a partial file
+            target = pathlib.Path(textfile_dir) / f"airtable_{script.replace('-', '_')}.prom"
+            tmp = target.with_suffix(".prom.tmp")
+            tmp.write_text(self.openmetrics(summary), encoding="utf-8")
+            os.replace(tmp, target)
+
+        rate = f", {summary['records_per_sec']} records/sec" if summary["records_per_sec"] else ""
+        print(f"\n📈 {summary['total_requests']} requests in {summary['elapsed_seconds']}s{rate}, "
+              f"{summary['retries']} retries ({summary['throttled']} throttled) — {log_path}")
+        return summary
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Local SQLite mirror of Airtable tables.
+
+Records are stored per table ID and refreshed incrementally: after the first
+full download, refresh() only asks Airtable for records modified since the
+last refresh (LAST_MODIFIED_TIME() filter). Scripts read from the mirror
+instead of re-paging the whole base, so dry runs and repeated planning passes
+cost one small request instead of a full download.
+
+Usage:
+    from airtable_mirror import AirtableMirror
+
+    mirror = AirtableMirror(client)
+    mirror.refresh(table_id, prune_every=PRUNE_EVERY)  # incremental; full=True to rebuild
+    for record in mirror.records(table_id, fields=["Date", "Platform"]):
+        ...
+
+Deleted records are invisible to a modified-time filter, so refresh(prune=True)
+additionally sweeps the table's ids (no field payload) and drops stale rows.
+The sweep pages through every id of the table, so scripts run it only every
+PRUNE_EVERY refreshes (prune_every), or on request (--prune).
+"""
+
+import json
+import pathlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from airtable_records import Columns, CompactRecord
+
+project_root = pathlib.Path(__file__).parent.parent
+DEFAULT_DIR = project_root / ".cache"
+
+# Records modified slightly before the recorded refresh time are re-fetched
+# to cover clock skew between this machine and Airtable
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+# Refreshes between the scripts' sweeps for deleted records
+PRUNE_EVERY = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    table_id TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    created_time TEXT,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (table_id, record_id)
+);
+CREATE TABLE IF NOT EXISTS refreshes (
+    table_id TEXT PRIMARY KEY,
+    refreshed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prunes (
+    table_id TEXT PRIMARY KEY,
+    refreshes_since INTEGER NOT NULL
+);
+"""
+
+
+def modified_since_formula(timestamp):
+    """filterByFormula matching records modified after an ISO-8601 timestamp."""
+    return f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{timestamp}'))"
+
+
+class AirtableMirror:
+    """SQLite-backed copy of one base's tables, keyed by table ID."""
+
+    def __init__(self, client, path=None):
+        self.client = client
+        if path is None:
+            DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
+            path = DEFAULT_DIR / f"airtable-mirror-{client.base_id}.sqlite3"
+        self.path = pathlib.Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def last_refresh(self, table_id):
+        row = self.db.execute(
+            "SELECT refreshed_at FROM refreshes WHERE table_id = ?", (table_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def refreshes_since_prune(self, table_id):
+        """Refreshes since deleted records were last dropped, or None if they never were."""
+        row = self.db.execute(
+            "SELECT refreshes_since FROM prunes WHERE table_id = ?", (table_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, table_id, full=False, prune=False, prune_every=None):
+        """
+        Bring the mirror of `table_id` up to date. Returns the number of
+        records written (plus any pruned). With `prune_every`, deleted
+        records are also swept when that many refreshes have passed since
+        the last sweep.
+        """
+        started = datetime.now(timezone.utc)
+        since = None if full else self.last_refresh(table_id)
+        if prune_every and since and not prune:
+            count = self.refreshes_since_prune(table_id)
+            prune = count is None or count + 1 >= prune_every
+
+        formula = None
+        if since:
+            overlap = datetime.fromisoformat(since) - REFRESH_OVERLAP
+            formula = modified_since_formula(overlap.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+
+        changed = 0
+        with self.db:
+            if full:
+                self.db.execute("DELETE FROM records WHERE table_id = ?", (table_id,))
+
+            for page in self.client.iter_pages(table_id, formula=formula):
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO records (table_id, record_id, created_time, fields) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(table_id, r["id"], r.get("createdTime"), json.dumps(r.get("fields", {})))
+                     for r in page],
+                )
+                changed += len(page)
+
+            if prune and not full:
+                changed += self._prune(table_id)
+
+            self.db.execute(
+                "INSERT OR REPLACE INTO refreshes (table_id, refreshed_at) VALUES (?, ?)",
+                (table_id, started.isoformat()),
+            )
+            # A full or first download holds no deleted records either
+            if prune or not since:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO prunes (table_id, refreshes_since) VALUES (?, 0)", (table_id,)
+                )
+            else:
+                self.db.execute(
+                    "UPDATE prunes SET refreshes_since = refreshes_since + 1 WHERE table_id = ?", (table_id,)
+                )
+
+        return changed
+
+    def _prune(self, table_id):
+        live = {r["id"] for r in self.client.iter_records(table_id, fields=[])}
+        stored = [row[0] for row in self.db.execute(
+            "SELECT record_id FROM records WHERE table_id = ?", (table_id,)
+        )]
+        stale = [(table_id, rid) for rid in stored if rid not in live]
+        self.db.executemany("DELETE FROM records WHERE table_id = ? AND record_id = ?", stale)
+        return len(stale)
+
+    def records(self, table_id, fields=None, compact=False):
+        """
+        Yield mirrored records in Airtable's {"id", "createdTime", "fields"}
+        shape, or as CompactRecords (airtable_records.py) with `compact`.
+        """
+        columns = Columns(fields or ()) if compact else None
+        rows = self.db.execute(
+            "SELECT record_id, created_time, fields FROM records WHERE table_id = ? ORDER BY rowid",
+            (table_id,),
+        )
+        for record_id, created_time, raw in rows:
+            record_fields = json.loads(raw)
+            if fields is not None:
+                record_fields = {k: v for k, v in record_fields.items() if k in fields}
+            if compact:
+                yield CompactRecord(record_id, columns.pack(record_fields), columns)
+            else:
+                yield {"id": record_id, "createdTime": created_time, "fields": record_fields}
+
+    def count(self, table_id):
+        return self.db.execute(
+            "SELECT COUNT(*) FROM records WHERE table_id = ?", (table_id,)
+        ).fetchone()[0]
+
+    def clear(self, table_id):
+        """Forget a table, e.g. after it was truncated remotely."""
+        with self.db:
+            self.db.execute("DELETE FROM records WHERE table_id = ?", (table_id,))
+            self.db.execute("DELETE FROM refreshes WHERE table_id = ?", (table_id,))
+            self.db.execute("DELETE FROM prunes WHERE table_id = ?", (table_id,))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Offline snapshot → plan → apply pipeline for the Airtable migrations.
+
+1. snapshot: stream a table (projected fields) into a gzip-compressed NDJSON
+   file under .cache/snapshots/. One header line, then one record per line.
+2. plan: run a script's mapping logic against snapshots instead of the API
+   and write the resulting creates/updates/upserts/deletes to a gzip NDJSON
+   plan under .cache/plans/. Planning makes no requests, so it is CPU-only
+   and can be repeated and inspected (zcat | jq) as often as needed.
+3. apply: stream the plan into the client's batch writers, which send
+   10-record batches concurrently under the base's rate limit.
+
+Plan writers have the same add()/close() interface as BatchWriter and take
+the same items, so a script switches from writing live to writing a plan by
+swapping the writer it feeds:
+
+    plan = WritePlan(plan_path("migrate-deal-posts", base_id), "migrate-deal-posts", base_id)
+    writer = plan.writer("create", keyed=True)
+    writer.add(table_id, (source_id, fields))
+    plan.close()
+
+    for op, result in apply_plan(client, path):
+        ...   # BatchResults, as from the live writers
+
+Plan entries:
+    {"op": "create", "table": T, "key": K, "fields": {...}}
+    {"op": "update", "table": T, "id": R, "fields": {...}}
+    {"op": "upsert", "table": T, "key": K, ["id": R,] "fields": {...}, "mergeOn": [...]}
+    {"op": "delete", "table": T, "id": R}
+"""
+
+import gzip
+import json
+import pathlib
+from collections import Counter
+from datetime import datetime, timezone
+
+project_root = pathlib.Path(__file__).parent.parent
+SNAPSHOT_DIR = project_root / ".cache" / "snapshots"
+PLAN_DIR = project_root / ".cache" / "plans"
+
+OPS = ("create", "update", "upsert", "delete")
+
+
+def snapshot_path(table_id, base_id):
+    return SNAPSHOT_DIR / f"{base_id}-{table_id}.ndjson.gz"
+
+
+def plan_path(script, base_id):
+    return PLAN_DIR / f"{script}-{base_id}.ndjson.gz"
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ----------------------------------------------------------------------
+# Snapshots
+# ----------------------------------------------------------------------
+
+def write_snapshot(client, table_id, fields=None, path=None):
+    """Stream a table into a compressed NDJSON snapshot. Returns (path, record count)."""
+    path = pathlib.Path(path or snapshot_path(table_id, client.base_id))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    count = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        header = {"snapshot": table_id, "base": client.base_id, "fields": fields, "taken_at": now()}
+        f.write(json.dumps(header) + "\n")
+        for record in client.iter_records(table_id, fields=fields, shards=client.read_shards):
+            f.write(json.dumps({"id": record["id"], "fields": record.get("fields", {})}) + "\n")
+            count += 1
+
+    # Only replace the previous snapshot once this one is complete
+    tmp.replace(path)
+    return path, count
+
+
+def read_snapshot(path):
+    """Header dict of a snapshot."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def iter_snapshot(path):
+    """Stream the records of a snapshot in API shape."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline()  # header
+        for line in f:
+            yield json.loads(line)
+
+
+# ----------------------------------------------------------------------
+# Plans
+# ----------------------------------------------------------------------
+
+class PlanWriter:
+    """BatchWriter stand-in that records one op's items in a WritePlan."""
+
+    def __init__(self, plan, op, keyed=False, merge_on=None):
+        self.plan = plan
+        self.op = op
+        self.keyed = keyed
+        self.merge_on = merge_on
+
+    def add(self, table_id, item):
+        entry = {"op": self.op, "table": table_id}
+        if self.keyed:
+            entry["key"], item = item
+
+        if self.op == "create":
+            entry["fields"] = item
+        elif self.op == "update":
+            entry["id"], entry["fields"] = item["id"], item["fields"]
+        elif self.op == "upsert":
+            if item.get("id"):
+                entry["id"] = item["id"]
+            entry["fields"] = item["fields"]
+            entry["mergeOn"] = self.merge_on
+        else:
+            entry["id"] = item
+
+        self.plan.write(entry)
+        return []
+
+    def close(self):
+        return []
+
+
+class WritePlan:
+    """A compressed NDJSON write plan being built by a script's plan stage."""
+
+    def __init__(self, path, script, base_id, sources=()):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.file = gzip.open(self.tmp, "wt", encoding="utf-8")
+        self.counts = Counter()
+        header = {"plan": script, "base": base_id, "created_at": now(), "sources": [str(s) for s in sources]}
+        self.file.write(json.dumps(header) + "\n")
+
+    def writer(self, op, keyed=False, merge_on=None):
+        if op not in OPS:
+            raise ValueError(f"Unknown plan op {op!r}")
+        return PlanWriter(self, op, keyed, merge_on)
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.counts[(entry["op"], entry["table"])] += 1
+
+    def close(self):
+        self.file.close()
+        self.tmp.replace(self.path)
+
+    def summary(self):
+        """Lines describing the plan, e.g. "create  tblXXX  120"."""
+        return [f"{op:<8}{table:<20}{count:>8}" for (op, table), count in sorted(self.counts.items())]
+
+
+def read_plan(path):
+    """Header dict of a plan."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def iter_plan(path):
+    """Stream the entries of a plan."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline()  # header
+        for line in f:
+            yield json.loads(line)
+
+
+def apply_plan(client, path, max_workers=None, skip=None, dead_letter=None):
+    """
+    Execute a plan with the client's concurrent batch writers. Yields
+    (op, BatchResult) as batches complete; create and upsert items are keyed
+    like the live writers, so scripts can reuse their result reporting.
+    Entries whose key is in `skip` (e.g. a resumed journal) are not sent, and
+    items that fail go to the `dead_letter` log when given.
+    """
+    writers = {}
+
+    def writer_for(entry):
+        op = entry["op"]
+        merge_on = tuple(entry.get("mergeOn") or ())
+        key = (op, merge_on)
+        if key not in writers:
+            if op == "create":
+                writers[key] = client.create_writer(max_workers, keyed=True, dead_letter=dead_letter)
+            elif op == "update":
+                writers[key] = client.update_writer(max_workers, dead_letter=dead_letter)
+            elif op == "upsert":
+                writers[key] = client.upsert_writer(list(merge_on), max_workers, keyed=True,
+                                                    dead_letter=dead_letter)
+            elif op == "delete":
+                writers[key] = client.delete_writer(max_workers, dead_letter=dead_letter)
+            else:
+                raise ValueError(f"Unknown plan op {op!r}")
+        return writers[key]
+
+    for entry in iter_plan(path):
+        if skip is not None and entry.get("key") in skip:
+            continue
+        op = entry["op"]
+        if op == "create":
+            item = (entry.get("key"), entry["fields"])
+        elif op == "update":
+            item = {"id": entry["id"], "fields": entry["fields"]}
+        elif op == "upsert":
+            upsert = {"fields": entry["fields"]}
+            if entry.get("id"):
+                upsert["id"] = entry["id"]
+            item = (entry.get("key"), upsert)
+        else:
+            item = entry["id"]
+
+        for result in writer_for(entry).add(entry["table"], item):
+            yield op, result
+
+    for (op, _), writer in writers.items():
+        for result in writer.close():
+            yield op, result
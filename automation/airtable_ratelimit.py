@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate control for Airtable requests.
+
+Airtable allows 5 requests/second per base and answers anything faster with
+HTTP 429, after which the base is locked out for ~30 seconds. RateController
+keeps every thread of a client under that limit:
+
+- a token bucket paces request starts at the current rate, which tops out
+  RATE_HEADROOM below the configured limit
+- an AIMD window caps requests in flight: +1 after a window's worth of
+  clean responses, halved on every 429
+- the rate itself backs off multiplicatively on 429 and creeps back up to
+  the configured ceiling as requests succeed
+- Retry-After pauses *all* threads, not just the one that was throttled
+- retry delays use exponential backoff with full jitter
+
+Usage (done for you by AirtableClient.request):
+    controller = RateController(rate=5, max_concurrency=4)
+    controller.acquire()
+    ... send ...
+    controller.release(throttled=response.status_code == 429, retry_after=..., ok=...)
+"""
+
+import random
+import threading
+import time
+
+DEFAULT_MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+# Airtable's documented lockout when no Retry-After header is sent
+THROTTLE_PENALTY = 30.0
+
+# Fraction of the configured limit requests are paced at. Network jitter
+# bunches request arrivals, so pacing exactly at 5/second still lands six in
+# some of Airtable's one-second windows, and every 429 costs a lockout
+RATE_HEADROOM = 0.9
+
+# HTTP statuses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds form), or None."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateController:
+    """Token bucket + AIMD concurrency window shared by all threads of a client."""
+
+    def __init__(self, rate, max_concurrency, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.max_rate = float(rate) * RATE_HEADROOM if rate else 0.0
+        self.rate = self.max_rate
+        self.max_concurrency = max(1, max_concurrency)
+        self.window = self.max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.lock = threading.Condition()
+        self.in_flight = 0
+        self.successes = 0
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    def acquire(self):
+        """Block until a concurrency slot and a rate token are available."""
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                if self.paused_until > now:
+                    self.lock.wait(self.paused_until - now)
+                elif self.in_flight >= self.window:
+                    self.lock.wait()
+                else:
+                    break
+
+            self.in_flight += 1
+            if not self.rate:
+                return
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.rate
+
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self, throttled=False, retry_after=None, ok=True):
+        """
+        Return the slot and adjust the window/rate from the outcome. Failed
+        but unthrottled requests (`ok=False`, e.g. 5xx) neither grow nor
+        shrink the window.
+        """
+        with self.lock:
+            self.in_flight -= 1
+
+            if throttled:
+                self.throttled += 1
+                self.successes = 0
+                self.window = max(1, self.window // 2)
+                if self.rate:
+                    self.rate = max(self.max_rate / 10, self.rate / 2)
+                pause = retry_after if retry_after is not None else THROTTLE_PENALTY
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            elif ok:
+                self.successes += 1
+                if self.successes >= self.window:
+                    self.successes = 0
+                    self.window = min(self.max_concurrency, self.window + 1)
+                if self.rate:
+                    self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+            self.lock.notify_all()
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry `attempt` (0-based): Retry-After if given, else jittered exponential."""
+        with self.lock:
+            self.retries += 1
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
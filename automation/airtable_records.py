@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory records for large Airtable table loads.
+
+A raw API record is a dict holding "id", "createdTime" and a nested "fields"
+dict, with every select option string ("Commercial Banking", "Draft", ...)
+stored again per row. CompactRecord keeps only the id and a tuple of
+projected field values in a column order shared by every record of the same
+load. Short strings (select options, names) are interned and multiselect
+lists become shared tuples, so repeated values are stored once.
+
+CompactRecord supports the read-only dict access the scripts already use
+(record["id"], record.get("fields", {}), fields.get(name)), so code written
+against raw records works unchanged, except that multiselect values are
+tuples rather than lists.
+
+Usage:
+    for record in client.iter_records(table_id, fields=[...], compact=True):
+        ...
+    records = client.get_all_records(table_id, compact=True)
+"""
+
+import sys
+from collections.abc import Mapping
+
+# Strings up to this length are interned; longer text (copy, notes) is not,
+# since it is rarely repeated
+INTERN_MAX_LENGTH = 64
+
+MISSING = object()
+
+
+def intern_value(value, shared):
+    """
+    Intern short strings. Multiselect lists become tuples of interned strings,
+    deduplicated through `shared` so rows with the same selection share one
+    tuple.
+    """
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+    if isinstance(value, list):
+        items = tuple(sys.intern(v) if isinstance(v, str) and len(v) <= INTERN_MAX_LENGTH else v for v in value)
+        try:
+            return shared.setdefault(items, items)
+        except TypeError:
+            return items  # unhashable elements (attachments, collaborators)
+    return value
+
+
+class Columns:
+    """Field name → tuple position, shared by all records from one load."""
+
+    __slots__ = ("index", "names", "shared")
+
+    def __init__(self, names=()):
+        self.index = {}
+        self.names = []
+        self.shared = {}
+        for name in names:
+            self.position(name)
+
+    def position(self, name):
+        i = self.index.get(name)
+        if i is None:
+            i = self.index[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return i
+
+    def pack(self, fields):
+        """Field dict → values tuple (None where a field is absent)."""
+        positions = [(self.position(name), value) for name, value in fields.items()]
+        values = [None] * len(self.names)
+        for i, value in positions:
+            values[i] = intern_value(value, self.shared)
+        return tuple(values)
+
+
+class CompactFields(Mapping):
+    """Read-only dict view over a CompactRecord's values."""
+
+    __slots__ = ("values", "columns")
+
+    def __init__(self, values, columns):
+        self.values = values
+        self.columns = columns
+
+    def get(self, name, default=None):
+        i = self.columns.index.get(name)
+        if i is None or i >= len(self.values):
+            return default
+        value = self.values[i]
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        value = self.get(name, MISSING)
+        if value is MISSING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name, MISSING) is not MISSING
+
+    def __iter__(self):
+        return (name for name, value in zip(self.columns.names, self.values) if value is not None)
+
+    def __len__(self):
+        return sum(value is not None for value in self.values)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CompactRecord:
+    """An Airtable record as (id, values tuple, shared Columns)."""
+
+    __slots__ = ("id", "values", "columns")
+
+    def __init__(self, record_id, values, columns):
+        self.id = record_id
+        self.values = values
+        self.columns = columns
+
+    @classmethod
+    def from_api(cls, record, columns):
+        return cls(record["id"], columns.pack(record.get("fields", {})), columns)
+
+    @property
+    def fields(self):
+        return CompactFields(self.values, self.columns)
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.id
+        if key == "fields":
+            return self.fields
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {"id": self.id, "fields": dict(self.fields)}
+
+    def __repr__(self):
+        return f"CompactRecord({self.id!r}, {dict(self.fields)!r})"
+
+
+def compact_records(records, fields=None, columns=None):
+    """Convert an iterable of API-shaped records to CompactRecords sharing one Columns."""
+    columns = columns or Columns(fields or ())
+    for record in records:
+        yield CompactRecord.from_api(record, columns)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Hash-join relink engine for the competitor detail tables.
+
+Detail payloads (Services, Workforce, Marketing, ...) name their competitor
+in a text field. Instead of looking each one up against Airtable, Basic Info
+is read once (names only) into a normalized-name → record-id index, every
+payload is joined against it in memory, and the matched rows are created
+with their link field set through the client's concurrent 10-record create
+writer. Payloads that don't match exactly one competitor are reported as
+orphans locally and never sent.
+
+Payloads are read from a directory with one file per detail table, named by
+the table's key in the cleanup script: services.json (a JSON list of field
+dicts) or services.ndjson (one field dict per line).
+
+Usage:
+    index, ambiguous = build_name_index(client, basic_info_table_id)
+    stats, orphans = relink(client, index, ambiguous, load_payloads(directory, tables))
+"""
+
+import json
+import pathlib
+import re
+import unicodedata
+
+# Basic Info's competitor name field, and the detail tables' link to Basic Info
+NAME_FIELD = "Name"
+LINK_FIELD = "Competitor"
+
+# Trailing legal suffixes ignored when matching names ("Acme Pest, LLC" = "Acme Pest")
+LEGAL_SUFFIXES = {"inc", "llc", "ltd", "co", "corp", "company", "incorporated", "pllc", "lp"}
+
+NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_name(name):
+    """Matching key for a competitor name: case, accents, punctuation, spacing and legal suffix insensitive."""
+    if isinstance(name, (list, tuple)):
+        name = name[0] if name else ""
+    if not isinstance(name, str):
+        return None
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = NON_WORD.sub(" ", name.replace("&", " and ")).casefold()
+    words = name.split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words) or None
+
+
+def build_name_index(client, table_id, name_field=NAME_FIELD):
+    """
+    Read Basic Info once into {normalized name: record id}. Returns the index
+    and the set of names shared by more than one record, which can't be
+    linked unambiguously.
+    """
+    index = {}
+    ambiguous = set()
+    for record in client.iter_records(table_id, fields=[name_field], compact=True):
+        key = normalize_name(record.fields.get(name_field))
+        if key is None:
+            continue
+        if key in index:
+            ambiguous.add(key)
+        else:
+            index[key] = record.id
+    for key in ambiguous:
+        del index[key]
+    return index, ambiguous
+
+
+def read_payload_file(path):
+    """Stream the field dicts in a .json list or .ndjson file."""
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".ndjson":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def load_payloads(directory, tables):
+    """
+    {table_id: payload iterator} for each {name: table_id} with a
+    <name>.json or <name>.ndjson file in `directory`.
+    """
+    directory = pathlib.Path(directory)
+    payloads = {}
+    for name, table_id in tables.items():
+        for suffix in (".ndjson", ".json"):
+            path = directory / f"{name}{suffix}"
+            if path.exists():
+                payloads[table_id] = read_payload_file(path)
+                break
+    return payloads
+
+
+def relink(client, index, ambiguous, payloads, link_field=LINK_FIELD):
+    """
+    Join payloads against the name index and create the linked rows.
+
+    Returns (stats, orphans): stats is {table_id: {"payloads", "created",
+    "orphans", "failed"}}, orphans a list of {"table", "competitor",
+    "reason", "fields"} for payloads that weren't sent.
+    """
+    stats = {table_id: {"payloads": 0, "created": 0, "orphans": 0, "failed": 0} for table_id in payloads}
+    orphans = []
+
+    def report(results):
+        for result in results:
+            table = stats[result.table_id]
+            if result.error:
+                table["failed"] += len(result.items)
+                print(f"   ❌ Error creating linked records: {result.error.status_code}")
+                print(f"      {result.error.error}")
+            else:
+                table["created"] += len(result.records)
+
+    writer = client.create_writer()
+    for table_id, rows in payloads.items():
+        table = stats[table_id]
+        for fields in rows:
+            table["payloads"] += 1
+            competitor = fields.get(link_field)
+            key = normalize_name(competitor)
+            record_id = index.get(key)
+            if record_id is None:
+                table["orphans"] += 1
+                reason = "ambiguous" if key in ambiguous else "no match"
+                orphans.append({"table": table_id, "competitor": competitor, "reason": reason, "fields": fields})
+                continue
+            report(writer.add(table_id, {**fields, link_field: [record_id]}))
+
+    report(writer.close())
+    return stats, orphans
+
+
+def write_orphans(orphans, path):
+    """Save orphaned payloads as NDJSON so they can be fixed and reloaded."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for orphan in orphans:
+            f.write(json.dumps(orphan) + "\n")
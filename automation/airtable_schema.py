@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Local pre-flight validation of writes against config/airtable.json.
+
+Airtable only rejects a bad row (unknown field, select option it doesn't
+have, wrong type, missing required field) with a 422 for the whole 10-record
+batch, after the request has used a rate-limited slot. TableSchema compiles
+a table definition from config/airtable.json "tables" once, and
+ValidatingWriter checks every item before it reaches a batch writer, so only
+valid rows are sent and invalid ones are quarantined to an NDJSON report
+(.cache/quarantine/<script>-<base>.ndjson) with the reasons.
+
+Checks:
+- field names must be defined for the table
+- values must match the field type (text, number/currency, date, select,
+  multiselect, record link, attachment, checkbox)
+- select values must be one of the field's options, unless the options are
+  still {{PLACEHOLDER}} templates and so can't be known here
+- required fields must be present on creates (updates are partial)
+
+None and "" are treated as blank and not type-checked.
+
+Usage:
+    schemas = {table_id: load_schema("commercialDeals")}
+    quarantine = Quarantine.for_script("migrate-deal-posts", client.base_id)
+    writer = ValidatingWriter(client.create_writer(keyed=True), schemas, quarantine, keyed=True)
+"""
+
+import json
+import pathlib
+import re
+from collections import Counter
+
+from airtable_mapping import CONFIG_PATH, load_config
+
+project_root = pathlib.Path(__file__).parent.parent
+QUARANTINE_DIR = project_root / ".cache" / "quarantine"
+
+DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+RECORD_ID = re.compile(r"rec[A-Za-z0-9]+")
+
+
+def is_text(value):
+    return isinstance(value, str)
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_date(value):
+    return isinstance(value, str) and DATE.match(value) is not None
+
+
+def is_checkbox(value):
+    return isinstance(value, bool)
+
+
+def is_text_list(value):
+    return isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value)
+
+
+def is_record_links(value):
+    return isinstance(value, (list, tuple)) and all(isinstance(v, str) and RECORD_ID.fullmatch(v) for v in value)
+
+
+def is_attachments(value):
+    return isinstance(value, (list, tuple)) and all(isinstance(v, dict) and ("url" in v or "id" in v) for v in value)
+
+
+# Airtable field type → value check; unlisted types are accepted as-is
+TYPE_CHECKS = {
+    "singleLineText": is_text,
+    "multilineText": is_text,
+    "richText": is_text,
+    "email": is_text,
+    "url": is_text,
+    "phoneNumber": is_text,
+    "number": is_number,
+    "currency": is_number,
+    "percent": is_number,
+    "rating": is_number,
+    "date": is_date,
+    "dateTime": is_date,
+    "checkbox": is_checkbox,
+    "singleSelect": is_text,
+    "multipleSelects": is_text_list,
+    "recordLink": is_record_links,
+    "multipleRecordLinks": is_record_links,
+    "multipleAttachments": is_attachments,
+}
+
+
+class TableSchema:
+    """One table definition from config/airtable.json, compiled for validation."""
+
+    def __init__(self, key, table):
+        self.key = key
+        self.name = table["name"]
+        self.rules = {}
+        self.required = []
+
+        for field in table["fields"].values():
+            options = field.get("options")
+            if options and any("{{" in option for option in options):
+                options = None  # Still templated per client; can't be checked here
+            check = TYPE_CHECKS.get(field.get("type"))
+            self.rules[field["name"]] = (field.get("type"), check, frozenset(options) if options else None)
+            if field.get("required"):
+                self.required.append(field["name"])
+
+    def validate(self, fields, partial=False):
+        """Problems with a row's fields ([] when valid). `partial` skips required checks (updates)."""
+        problems = []
+        for name, value in fields.items():
+            rule = self.rules.get(name)
+            if rule is None:
+                problems.append(f"unknown field {name!r}")
+                continue
+            if value is None or value == "":
+                continue
+
+            field_type, check, options = rule
+            if check and not check(value):
+                problems.append(f"{name}: expected {field_type}, got {value!r}")
+            elif options is not None:
+                for choice in value if isinstance(value, (list, tuple)) else [value]:
+                    if choice not in options:
+                        problems.append(f"{name}: {choice!r} is not an option")
+
+        if not partial:
+            for name in self.required:
+                if fields.get(name) in (None, "", [], ()):
+                    problems.append(f"{name}: required")
+        return problems
+
+
+def load_schema(key, config=None):
+    """Compile the named table from config/airtable.json "tables"."""
+    config = config or load_config()
+    table = config.get("tables", {}).get(key)
+    if table is None:
+        raise ValueError(f"No table named {key!r} in {CONFIG_PATH}")
+    return TableSchema(key, table)
+
+
+class Quarantine:
+    """NDJSON report of rows that failed validation, written as they're found."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.file = None
+        self.counts = Counter()
+
+    @classmethod
+    def for_script(cls, script_name, base_id):
+        return cls(QUARANTINE_DIR / f"{script_name}-{base_id}.ndjson")
+
+    def add(self, table_id, key, problems, fields):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, "w", encoding="utf-8")
+        entry = {"table": table_id, "key": key, "problems": problems, "fields": dict(fields)}
+        self.file.write(json.dumps(entry) + "\n")
+        self.counts[table_id] += 1
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class ValidatingWriter:
+    """
+    Wraps a BatchWriter (or plan writer) and only passes on valid items.
+
+    `op` says what the items are: "create" (field dicts, all required
+    fields needed), "update" ({"id", "fields"}, partial) or "upsert"
+    ({"fields"[, "id"]}; partial only when updating by id). With `keyed`,
+    items are (key, item) pairs. Tables without a schema pass through.
+    """
+
+    def __init__(self, writer, schemas, quarantine, op="create", keyed=False):
+        self.writer = writer
+        self.schemas = schemas
+        self.quarantine = quarantine
+        self.op = op
+        self.keyed = keyed
+
+    def problems(self, table_id, item):
+        """Validation problems for one item ([] when valid or unchecked)."""
+        schema = self.schemas.get(table_id)
+        if schema is None:
+            return []
+        if self.keyed:
+            _, item = item
+        if self.op == "create":
+            return schema.validate(item)
+        return schema.validate(item["fields"], partial=self.op == "update" or bool(item.get("id")))
+
+    def add(self, table_id, item):
+        problems = self.problems(table_id, item)
+        if problems:
+            key, value = item if self.keyed else (None, item)
+            if self.op == "create":
+                fields = value
+            else:
+                key, fields = key or value.get("id"), value["fields"]
+            self.quarantine.add(table_id, key, problems, fields)
+            return []
+        return self.writer.add(table_id, item)
+
+    def close(self):
+        return self.writer.close()
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Airtable REST API, for benchmarks and dry testing.
+
+Implements the subset the automation scripts use:
+- GET    /v0/{base}/{table}            list records (pageSize, offset, fields[],
+                                       filterByFormula)
+- POST   /v0/{base}/{table}            create one record or up to 10
+- PATCH  /v0/{base}/{table}[/{id}]     update one record or up to 10, or upsert up
+                                       to 10 with performUpsert.fieldsToMergeOn
+- DELETE /v0/{base}/{table}[/{id}]     delete one record or up to 10 (records[])
+
+Offsets are cursors (the last record id returned), so deleting records while
+paginating behaves like Airtable rather than shifting pages. filterByFormula
+is evaluated for the functions the scripts use (AND, OR, NOT, comparisons,
+BLANK, FIND, RIGHT, LEN, REGEX_MATCH, RECORD_ID, CREATED_TIME, IS_BEFORE,
+IS_AFTER, DATETIME_PARSE); anything else, such as LAST_MODIFIED_TIME(), is
+unknown and doesn't exclude records, so callers still re-check locally.
+
+Select fields can be restricted to a set of options (FakeAirtable.restrict);
+like Airtable without typecast, a write with any other value gets 422
+INVALID_MULTIPLE_CHOICE_OPTIONS for the whole batch.
+
+Throttling mimics Airtable's per-base limit: more than `rate_limit` requests
+in a one-second window get 429 with Retry-After. `latency` adds a fixed
+delay per request to simulate network round trips.
+
+Control endpoints (not counted in stats):
+- GET  /_stats    request counts, 429s, records per table
+- POST /_reset    drop all tables and counters
+
+Run standalone:
+    python3 fake_airtable_server.py --port 8765 --rate-limit 5 --latency-ms 50
+then point the scripts at it with AIRTABLE_API_URL=http://127.0.0.1:8765/v0
+"""
+
+import argparse
+import bisect
+import functools
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_BATCH_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+# ----------------------------------------------------------------------
+# filterByFormula
+# ----------------------------------------------------------------------
+
+FORMULA_TOKEN = re.compile(r"""\s*(?:(\{[^}]*\})|("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(\d+(?:\.\d+)?)"""
+                           r"""|([A-Za-z_][A-Za-z_0-9]*)|(!=|<=|>=|[=<>&(),]))""")
+
+UNKNOWN = object()  # Result of anything the evaluator doesn't implement
+
+
+def tokenize(formula):
+    tokens = []
+    pos = 0
+    formula = formula.rstrip()
+    while pos < len(formula):
+        match = FORMULA_TOKEN.match(formula, pos)
+        if not match:
+            raise ValueError(f"Can't parse formula at {formula[pos:]!r}")
+        field, string, number, name, op = match.groups()
+        if field:
+            tokens.append(("field", field[1:-1]))
+        elif string:
+            tokens.append(("value", re.sub(r"\\(.)", r"\1", string[1:-1])))
+        elif number:
+            tokens.append(("value", float(number)))
+        elif name:
+            tokens.append(("name", name.upper()))
+        else:
+            tokens.append(("op", op))
+        pos = match.end()
+    return tokens
+
+
+def parse_formula(formula):
+    """Parse a formula into nested tuples: ("field", name), ("value", v), ("call", name, args), ("op", op, a, b)."""
+    tokens = tokenize(formula)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def take(kind=None, value=None):
+        nonlocal pos
+        token = peek()
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            raise ValueError(f"Unexpected {token[1]!r} in formula {formula!r}")
+        pos += 1
+        return token
+
+    def primary():
+        kind, value = peek()
+        if kind in ("field", "value"):
+            return take()
+        if kind == "name":
+            take()
+            take("op", "(")
+            args = []
+            while peek() != ("op", ")"):
+                args.append(expression())
+                if peek() == ("op", ","):
+                    take()
+            take("op", ")")
+            return ("call", value, args)
+        take("op", "(")
+        node = expression()
+        take("op", ")")
+        return node
+
+    def concat():
+        node = primary()
+        while peek() == ("op", "&"):
+            take()
+            node = ("op", "&", node, primary())
+        return node
+
+    def expression():
+        node = concat()
+        if peek()[0] == "op" and peek()[1] in ("=", "!=", "<", ">", "<=", ">="):
+            op = take()[1]
+            node = ("op", op, node, concat())
+        return node
+
+    node = expression()
+    if pos != len(tokens):
+        raise ValueError(f"Trailing input in formula {formula!r}")
+    return node
+
+
+def as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(as_text(v) for v in value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def truthy(value):
+    if value is UNKNOWN:
+        return UNKNOWN
+    return value not in ("", 0, False, [], None)
+
+
+def evaluate(node, record):
+    """
+    Evaluate a parsed formula against a record. Returns UNKNOWN for
+    functions this fake doesn't implement; AND/OR/NOT propagate it like
+    three-valued logic, so known parts (e.g. a shard predicate) still filter.
+    """
+    kind = node[0]
+    if kind == "value":
+        return node[1]
+    if kind == "field":
+        return record["fields"].get(node[1], "")
+
+    if kind == "op":
+        _, op, left, right = node
+        a, b = evaluate(left, record), evaluate(right, record)
+        if a is UNKNOWN or b is UNKNOWN:
+            return UNKNOWN
+        if op == "&":
+            return as_text(a) + as_text(b)
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            a, b = float(a), float(b)
+        else:
+            a, b = as_text(a), as_text(b)
+        return {"=": a == b, "!=": a != b, "<": a < b, ">": a > b, "<=": a <= b, ">=": a >= b}[op]
+
+    _, name, args = node
+    if name in ("AND", "OR"):
+        results = [truthy(evaluate(arg, record)) for arg in args]
+        decisive = name == "OR"
+        if decisive in results:
+            return decisive
+        return UNKNOWN if UNKNOWN in results else not decisive
+    if name == "NOT":
+        result = truthy(evaluate(args[0], record))
+        return UNKNOWN if result is UNKNOWN else not result
+
+    if name == "BLANK":
+        return ""
+    if name == "TRUE":
+        return True
+    if name == "FALSE":
+        return False
+    if name == "RECORD_ID":
+        return record["id"]
+    if name == "CREATED_TIME":
+        return record["createdTime"]
+
+    values = [evaluate(arg, record) for arg in args]
+    if UNKNOWN in values:
+        return UNKNOWN
+    if name == "DATETIME_PARSE":
+        return as_text(values[0])
+    if name in ("IS_BEFORE", "IS_AFTER"):
+        a, b = as_text(values[0]), as_text(values[1])
+        return a < b if name == "IS_BEFORE" else a > b
+    if name == "FIND":
+        return as_text(values[1]).find(as_text(values[0])) + 1
+    if name == "RIGHT":
+        text = as_text(values[0])
+        return text[-int(values[1]):] if values[1] else ""
+    if name == "LEN":
+        return len(as_text(values[0]))
+    if name == "REGEX_MATCH":
+        return re.search(as_text(values[1]), as_text(values[0])) is not None
+    return UNKNOWN
+
+
+@functools.lru_cache(maxsize=256)
+def compile_formula(formula):
+    """Record predicate for a filterByFormula value; only a definite false excludes a record."""
+    node = parse_formula(formula)
+    return lambda record: truthy(evaluate(node, record)) is not False
+
+
+class FakeTable:
+    """Records kept in id order; deleted ids stay in `order` as tombstones."""
+
+    def __init__(self):
+        self.records = {}
+        self.order = []
+        # Upsert lookups, per fieldsToMergeOn tuple
+        self.merge_indexes = {}
+
+    def add(self, record):
+        self.records[record["id"]] = record
+        self.order.append(record["id"])
+        for merge_on, index in self.merge_indexes.items():
+            index.setdefault(merge_key(record["fields"], merge_on), record["id"])
+
+    def update(self, record_id, fields):
+        """Merge `fields` into a record, keeping the upsert indexes current."""
+        record = self.records[record_id]
+        old_keys = {merge_on: merge_key(record["fields"], merge_on) for merge_on in self.merge_indexes}
+        record["fields"].update(fields)
+        for merge_on, index in self.merge_indexes.items():
+            if index.get(old_keys[merge_on]) == record_id:
+                del index[old_keys[merge_on]]
+            index.setdefault(merge_key(record["fields"], merge_on), record_id)
+        return record
+
+    def find(self, merge_on, fields):
+        """Id of the record whose merge_on fields equal those in `fields`, or None."""
+        index = self.merge_indexes.get(merge_on)
+        if index is None:
+            index = self.merge_indexes[merge_on] = {}
+            for record_id in self.order:
+                record = self.records.get(record_id)
+                if record is not None:
+                    index.setdefault(merge_key(record["fields"], merge_on), record_id)
+
+        key = merge_key(fields, merge_on)
+        record_id = index.get(key)
+        # Deleted records leave stale entries behind
+        if record_id is not None and record_id in self.records:
+            return record_id
+        return None
+
+    def page(self, after, size, match=None):
+        start = bisect.bisect_right(self.order, after) if after else 0
+        page = []
+        for record_id in itertools.islice(self.order, start, None):
+            record = self.records.get(record_id)
+            if record is not None and (match is None or match(record)):
+                page.append(record)
+                if len(page) == size:
+                    break
+        return page
+
+
+def merge_key(fields, merge_on):
+    return tuple(json.dumps(fields.get(name), sort_keys=True) for name in merge_on)
+
+
+class FakeAirtable:
+    """In-memory store plus the request accounting the benchmarks report."""
+
+    def __init__(self, rate_limit=0, latency=0.0):
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.tables = {}
+            self.ids = itertools.count(1)
+            self.requests = Counter()
+            self.records_written = Counter()
+            self.throttled = 0
+            self.windows = defaultdict(deque)  # base id -> request times in the last second
+            self.choices = {}  # (table id, field) -> allowed select options
+
+    def table(self, table_id):
+        if table_id not in self.tables:
+            self.tables[table_id] = FakeTable()
+        return self.tables[table_id]
+
+    def new_record(self, fields):
+        record_id = f"rec{next(self.ids):014d}"
+        return {"id": record_id, "createdTime": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                "fields": dict(fields)}
+
+    def seed(self, table_id, fields_list):
+        """Load records directly, bypassing HTTP and stats."""
+        with self.lock:
+            table = self.table(table_id)
+            for fields in fields_list:
+                table.add(self.new_record(fields))
+
+    def restrict(self, table_id, field, options):
+        """Only accept `options` as values of a select field."""
+        with self.lock:
+            self.choices[(table_id, field)] = set(options)
+
+    def invalid_choice(self, table_id, fields_list):
+        """The first (field, value) outside its allowed options, or None."""
+        for fields in fields_list:
+            for name, value in fields.items():
+                allowed = self.choices.get((table_id, name))
+                if allowed is None or value is None:
+                    continue
+                for choice in value if isinstance(value, list) else [value]:
+                    if choice not in allowed:
+                        return name, choice
+        return None
+
+    def admit(self, method, base_id):
+        """Count a request; False if it exceeds the base's per-second rate limit."""
+        with self.lock:
+            self.requests[method] += 1
+            if not self.rate_limit:
+                return True
+            now = time.monotonic()
+            window = self.windows[base_id]
+            while window and window[0] <= now - 1.0:
+                window.popleft()
+            if len(window) >= self.rate_limit:
+                self.throttled += 1
+                return False
+            window.append(now)
+            return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "throttled": self.throttled,
+                "records_written": dict(self.records_written),
+                "tables": {tid: len(t.records) for tid, t in self.tables.items()},
+            }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeAirtable/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def error(self, status, error_type, message=""):
+        self.send_json(status, {"error": {"type": error_type, "message": message}})
+
+    def dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query, keep_blank_values=True)
+
+        if parts == ["_stats"]:
+            return self.send_json(200, self.store.stats())
+        if parts == ["_reset"]:
+            self.store.reset()
+            return self.send_json(200, {"ok": True})
+
+        if len(parts) < 3 or parts[0] != "v0":
+            return self.error(404, "NOT_FOUND")
+
+        if not self.store.admit(self.command, parts[1]):
+            return self.send_json(429, {"errors": [{"error": "RATE_LIMIT_REACHED"}]},
+                                  headers={"Retry-After": "1"})
+        if self.store.latency:
+            time.sleep(self.store.latency)
+
+        table_id = parts[2]
+        record_id = parts[3] if len(parts) > 3 else None
+        handler = getattr(self, f"handle_{self.command.lower()}")
+        with self.store.lock:
+            if self.command in ("POST", "PATCH"):
+                items = body.get("records") or [body]
+                invalid = self.store.invalid_choice(table_id, [item.get("fields", {}) for item in items])
+                if invalid:
+                    return self.error(422, "INVALID_MULTIPLE_CHOICE_OPTIONS",
+                                      f"Insufficient permissions to create new select option \"{invalid[1]}\"")
+            return handler(self.store.table(table_id), table_id, record_id, query, body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = dispatch
+
+    # ------------------------------------------------------------------
+    # Record operations (called with the store lock held)
+    # ------------------------------------------------------------------
+
+    def handle_get(self, table, table_id, record_id, query, body):
+        if record_id:
+            record = table.records.get(record_id)
+            if record is None:
+                return self.error(404, "MODEL_ID_NOT_FOUND")
+            return self.send_json(200, record)
+
+        size = min(int(query.get("pageSize", [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+        formula = query.get("filterByFormula", [""])[0]
+        try:
+            match = compile_formula(formula) if formula else None
+        except ValueError as e:
+            return self.error(422, "INVALID_FILTER_BY_FORMULA", str(e))
+        page = table.page(query.get("offset", [None])[0], size, match)
+
+        fields = query.get("fields[]")
+        if fields is not None:
+            wanted = set(fields)
+            page = [{**r, "fields": {k: v for k, v in r["fields"].items() if k in wanted}} for r in page]
+
+        response = {"records": page}
+        if len(page) == size and table.page(page[-1]["id"], 1, match):
+            response["offset"] = page[-1]["id"]
+        return self.send_json(200, response)
+
+    def handle_post(self, table, table_id, record_id, query, body):
+        if "records" not in body:
+            record = self.store.new_record(body.get("fields", {}))
+            table.add(record)
+            self.store.records_written["created"] += 1
+            return self.send_json(200, record)
+
+        if len(body["records"]) > MAX_BATCH_SIZE:
+            return self.error(422, "INVALID_RECORDS", "Too many records in one request")
+
+        created = []
+        for item in body["records"]:
+            record = self.store.new_record(item.get("fields", {}))
+            table.add(record)
+            created.append(record)
+        self.store.records_written["created"] += len(created)
+        return self.send_json(200, {"records": created})
+
+    def handle_patch(self, table, table_id, record_id, query, body):
+        if body.get("performUpsert"):
+            return self.handle_upsert(table, body)
+
+        items = body.get("records") or [{"id": record_id, "fields": body.get("fields", {})}]
+        if len(items) > MAX_BATCH_SIZE:
+            return self.error(422, "INVALID_RECORDS", "Too many records in one request")
+        if any(item.get("id") not in table.records for item in items):
+            return self.error(404, "MODEL_ID_NOT_FOUND")
+
+        updated = []
+        for item in items:
+            updated.append(table.update(item["id"], item.get("fields", {})))
+        self.store.records_written["updated"] += len(updated)
+        return self.send_json(200, {"records": updated} if "records" in body else updated[0])
+
+    def handle_upsert(self, table, body):
+        merge_on = tuple(body["performUpsert"].get("fieldsToMergeOn") or ())
+        items = body.get("records", [])
+        if not merge_on or len(merge_on) > 3:
+            return self.error(422, "INVALID_MERGE_FIELD", "fieldsToMergeOn needs 1-3 fields")
+        if len(items) > MAX_BATCH_SIZE:
+            return self.error(422, "INVALID_RECORDS", "Too many records in one request")
+        if any(item.get("id") and item["id"] not in table.records for item in items):
+            return self.error(404, "MODEL_ID_NOT_FOUND")
+
+        records, created, updated = [], [], []
+        for item in items:
+            fields = item.get("fields", {})
+            existing = item.get("id") or table.find(merge_on, fields)
+            if existing:
+                record = table.update(existing, fields)
+                updated.append(existing)
+            else:
+                record = self.store.new_record(fields)
+                table.add(record)
+                created.append(record["id"])
+            records.append(record)
+
+        self.store.records_written["created"] += len(created)
+        self.store.records_written["updated"] += len(updated)
+        return self.send_json(200, {"records": records, "createdRecords": created, "updatedRecords": updated})
+
+    def handle_delete(self, table, table_id, record_id, query, body):
+        ids = query.get("records[]") or ([record_id] if record_id else [])
+        if len(ids) > MAX_BATCH_SIZE:
+            return self.error(422, "INVALID_RECORDS", "Too many records in one request")
+        if not ids or any(rid not in table.records for rid in ids):
+            return self.error(404, "MODEL_ID_NOT_FOUND")
+
+        for rid in ids:
+            del table.records[rid]
+        self.store.records_written["deleted"] += len(ids)
+        deleted = [{"id": rid, "deleted": True} for rid in ids]
+        return self.send_json(200, {"records": deleted} if query.get("records[]") else deleted[0])
+
+
+def start_server(port=0, rate_limit=0, latency=0.0):
+    """Start the fake server on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.store = FakeAirtable(rate_limit=rate_limit, latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Airtable API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, default=5, help="requests/second before 429 (0 = off)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="added delay per request")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.rate_limit, args.latency_ms / 1000)
+    print(f"Fake Airtable listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Airtable automation scripts against the local fake server.
+
+Each scenario seeds the fake base, runs the real script as a subprocess with
+AIRTABLE_API_URL pointed at the fake, and reports wall time, records/sec,
+requests by method, 429s, bytes received (from the script's own metrics) and
+the script's peak RSS.
+
+Run with:
+    python3 automation/benchmarks/run_benchmarks.py
+    python3 automation/benchmarks/run_benchmarks.py --sizes 1000 --scripts deal \\
+        --rate-limit 5 --latency-ms 80 --json bench.json
+
+The fake enforces --rate-limit requests/second per base (0 disables it) and
+the scripts are told the same limit via AIRTABLE_RATE_LIMIT, so results show
+how close each script gets to the configured budget.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_airtable_server import start_server
+
+automation_dir = pathlib.Path(__file__).parent.parent
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+BENCHMARK_BASE_ID = "appBenchmark"
+
+# Table IDs the benchmark seeds, keyed by the env var each script reads
+TABLE_ENV = {
+    "AIRTABLE_DEAL_POSTS_TABLE_ID": "tblBenchDealPosts",
+    "AIRTABLE_RESIDENTIAL_TABLE_ID": "tblBenchResidential",
+    "AIRTABLE_COMMERCIAL_TABLE_ID": "tblBenchCommercial",
+    "AIRTABLE_CONTENT_TABLE_ID": "tblBenchContent",
+    "AIRTABLE_TABLE_BASIC_INFO": "tblBenchBasicInfo",
+    "AIRTABLE_TABLE_SERVICES": "tblBenchServices",
+    "AIRTABLE_TABLE_WORKFORCE": "tblBenchWorkforce",
+    "AIRTABLE_TABLE_MARKETING": "tblBenchMarketing",
+    "AIRTABLE_TABLE_POSITIONING": "tblBenchPositioning",
+    "AIRTABLE_TABLE_SWOT": "tblBenchSwot",
+    "AIRTABLE_TABLE_AI_SEARCH": "tblBenchAiSearch",
+    "AIRTABLE_TABLE_MESSAGING": "tblBenchMessaging",
+}
+
+DETAIL_TABLE_ENV = [
+    "AIRTABLE_TABLE_SERVICES", "AIRTABLE_TABLE_WORKFORCE", "AIRTABLE_TABLE_MARKETING",
+    "AIRTABLE_TABLE_POSITIONING", "AIRTABLE_TABLE_SWOT", "AIRTABLE_TABLE_AI_SEARCH",
+    "AIRTABLE_TABLE_MESSAGING",
+]
+
+
+def benchmark_env(base_url, rate_limit, workers):
+    """
+    Environment for the scripts: fake base and table IDs only. The scripts
+    are pointed at an empty env file and inherited AIRTABLE_* variables are
+    dropped, so nothing from the real .env (base, tables, API URL) leaks in
+    and the journals, dead letters and quarantine files the scripts write
+    under .cache/ are keyed to the fake base, never a production one.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith("AIRTABLE_")}
+    env.update({
+        "AIRTABLE_ENV_FILE": os.devnull,
+        "AIRTABLE_API_URL": base_url,
+        "AIRTABLE_API_KEY": "patBenchmark",
+        "AIRTABLE_BASE_ID": BENCHMARK_BASE_ID,
+        "AIRTABLE_RATE_LIMIT": str(rate_limit),
+        "AIRTABLE_MAX_WORKERS": str(workers),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(TABLE_ENV)
+    return env
+
+
+# ----------------------------------------------------------------------
+# Seed data
+# ----------------------------------------------------------------------
+
+def deal_posts(n, rng):
+    areas = ["Residential", "Commercial Banking", "Commercial Leasing", ""]
+    properties = ["Residential", "Condo", "Co-op", "Retail", "Office", "Commercial", "Industrial"]
+    statuses = ["Raw Info", "Draft", "Ready for Review", "Approved", "Posted"]
+    return [{
+        "Deal Description": f"Closed {rng.choice(properties).lower()} deal #{i}",
+        "Deal Type": rng.choice(["Purchase", "Refinance", "Leasing"]),
+        "Deal Value": rng.randrange(100_000, 20_000_000, 50_000),
+        "Property Type": rng.choice(properties),
+        "Location": f"City {i % 50}",
+        "Practice Area": rng.choice(areas),
+        "Attorney": f"Attorney {i % 12}",
+        "Post Status": rng.choice(statuses),
+        "Post Copy": "Lorem ipsum dolor sit amet. " * 20,
+    } for i in range(n)]
+
+
+def calendar_posts(n, rng):
+    people = [["Company", "Partner A"], ["Partner A"], ["Partner B"], ["Company"]]
+    return [{
+        "Date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Post Topic": f"Topic {i}",
+        "Who to Post": rng.choice(people),
+        "Channels": [rng.choice(["LinkedIn", "Instagram", "Facebook", "X"])],
+        "Content Pillar": rng.choice(["Pillar 1", "Pillar 2", "Pillar 3"]),
+        "Copy": "Long-form post copy that the migration never reads. " * 40,
+    } for i in range(n)]
+
+
+def seed_deal(store, env, n, rng):
+    store.seed(env["AIRTABLE_DEAL_POSTS_TABLE_ID"], deal_posts(n, rng))
+
+
+def seed_calendar(store, env, n, rng):
+    store.seed(env["AIRTABLE_CONTENT_TABLE_ID"], calendar_posts(n, rng))
+
+
+def seed_cleanup(store, env, n, rng):
+    store.seed(env["AIRTABLE_TABLE_BASIC_INFO"], [{"Name": f"Competitor {i}"} for i in range(10)])
+    per_table = max(1, n // len(DETAIL_TABLE_ENV))
+    for name in DETAIL_TABLE_ENV:
+        store.seed(env[name], [{"Competitor": f"Competitor {i % 10}", "Notes": "x" * 200}
+                               for i in range(per_table)])
+
+
+# Script, seeder and script arguments; every size reuses the same fake base,
+# so the deal migration starts a new journal each time
+SCENARIOS = {
+    "deal": ("migrate-deal-posts.py", seed_deal, ["--fresh"]),
+    "calendar": ("migrate-content-calendar.py", seed_calendar, []),
+    "cleanup": ("cleanup-and-relink-airtable.py", seed_cleanup, []),
+}
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+def run_script(script, env, args=()):
+    """Run a script to completion. Returns (seconds, peak RSS in MB, exit status)."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(automation_dir / script), *args],
+        cwd=automation_dir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+
+    if process.returncode:
+        print(stderr.decode(errors="replace"), file=sys.stderr)
+    # ru_maxrss is KB on Linux
+    return elapsed, usage.ru_maxrss / 1024, process.returncode
+
+
+def run_scenario(server, env, name, size, seed):
+    script, seeder, args = SCENARIOS[name]
+    server.store.reset()
+    seeder(server.store, env, size, random.Random(seed))
+
+    # The script's own end-of-run metrics (airtable_metrics.py) add the
+    # client-side view: bytes on the wire and retries
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_log = pathlib.Path(tmp) / "metrics.ndjson"
+        elapsed, peak_rss, status = run_script(script, {**env, "AIRTABLE_METRICS_LOG": str(metrics_log)}, args)
+        client_metrics = json.loads(metrics_log.read_text().splitlines()[-1]) if metrics_log.exists() else {}
+
+    stats = server.store.stats()
+    return {
+        "scenario": name,
+        "script": script,
+        "records": size,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(size / elapsed, 1) if elapsed else None,
+        "requests": stats["requests"],
+        "total_requests": stats["total_requests"],
+        "throttled": stats["throttled"],
+        "records_written": stats["records_written"],
+        "bytes_sent": client_metrics.get("bytes_sent"),
+        "bytes_received": client_metrics.get("bytes_received"),
+        "retries": client_metrics.get("retries"),
+        "peak_rss_mb": round(peak_rss, 1),
+        "exit_status": status,
+    }
+
+
+def print_report(results):
+    header = (f"{'scenario':<10}{'records':>9}{'seconds':>10}{'rec/s':>10}{'requests':>10}"
+              f"{'429s':>7}{'MB in':>9}{'RSS MB':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        flag = "" if r["exit_status"] == 0 else f"  (exit {r['exit_status']})"
+        print(f"{r['scenario']:<10}{r['records']:>9}{r['seconds']:>10.2f}{r['records_per_sec']:>10.0f}"
+              f"{r['total_requests']:>10}{r['throttled']:>7}{(r['bytes_received'] or 0) / 1e6:>9.1f}"
+              f"{r['peak_rss_mb']:>9.1f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Airtable automation scripts")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated record counts")
+    parser.add_argument("--scripts", default=",".join(SCENARIOS),
+                        help=f"comma-separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument("--rate-limit", type=int, default=50,
+                        help="fake per-base requests/second, also passed to the scripts (0 = off)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated round-trip latency")
+    parser.add_argument("--workers", type=int, default=4, help="AIRTABLE_MAX_WORKERS for the scripts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_server(rate_limit=args.rate_limit, latency=args.latency_ms / 1000)
+    env = benchmark_env(base_url, args.rate_limit, args.workers)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for name in args.scripts.split(","):
+            print(f"Running {name} with {size} records...", file=sys.stderr)
+            results.append(run_scenario(server, env, name, size, args.seed))
+
+    server.shutdown()
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if any(r["exit_status"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Queue position and date scheduling for the Content Calendar.
+
+Posts are scheduled per lane, a (Posting Account, Platform) pair, under the
+rules in config/airtable.json "scheduling":
+- dailyCap: posts a lane may publish on one day
+- minDaysBetween: smallest gap between two posting days in a lane
+- repostDelayDays: a repost goes out at least this long after its source
+- pinnedStatuses: posts already Scheduled/Posted keep their date
+
+Original posts keep their Date; only reposts ("Source Post" set) are moved.
+Each dated repost is placed on the first day at or after its current Date
+that satisfies its lane's rules around the posts already there, in order of
+that date (a heap), and only once its source has been placed, no earlier
+than the source's day + repostDelayDays. Reposts are never moved earlier, so
+running the scheduler again changes nothing. Since reposts are taken in date
+order, a lane's frontier only moves forward and each placement is amortized
+O(1); days of fixed posts are kept as a sorted list per lane and checked
+with bisect. Queue Position is then the post's order within its lane and
+day. Overall O(n log n) for n posts.
+
+Posts without a Posting Account or Platform (unmigrated rows) belong to no
+lane and are left alone.
+
+Usage:
+    scheduler = Scheduler(load_rules())
+    for update in scheduler.changes(records):  # {"id", "fields"}, changed fields only
+        updated, failed = report_updates(writer.add(table_id, update))
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import date
+from functools import lru_cache
+from itertools import count
+
+from airtable_mapping import load_config
+
+# Content Calendar fields the scheduler reads
+SCHEDULE_FIELDS = ["Date", "Posting Account", "Platform", "Post Status", "Source Post", "Queue Position"]
+
+DEFAULT_RULE = {"dailyCap": 1, "minDaysBetween": 1}
+
+
+def load_rules(config=None):
+    """The "scheduling" section of config/airtable.json, with defaults filled in."""
+    config = config or load_config()
+    rules = config.get("scheduling", {})
+    return {
+        "repostDelayDays": rules.get("repostDelayDays", 2),
+        "pinnedStatuses": set(rules.get("pinnedStatuses", ["Scheduled", "Posted"])),
+        "default": {**DEFAULT_RULE, **rules.get("default", {})},
+        "accounts": rules.get("accounts", {}),
+    }
+
+
+@lru_cache(maxsize=None)
+def to_day(value):
+    """Day number for an Airtable date ("2025-03-14" or a dateTime), or None."""
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def from_day(day):
+    return date.fromordinal(day).isoformat()
+
+
+def first(value):
+    """First item of a list field (Source Post links), or the value itself."""
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+
+def report_updates(results):
+    """
+    Tally bulk PATCH outcomes from an update writer, printing each failed batch.
+    Returns (updated_count, failed_record_ids).
+    """
+    updated = 0
+    failed = []
+
+    for result in results:
+        if result.error:
+            ids = [u["id"] for u in result.items]
+            print(f"  Error updating {', '.join(ids)}: {result.error.error}")
+            failed.extend(ids)
+        else:
+            updated += len(result.records)
+
+    return updated, failed
+
+
+class Lane:
+    """Posting days used by one (Posting Account, Platform) lane."""
+
+    def __init__(self, daily_cap, min_days_between):
+        self.cap = max(1, daily_cap)
+        self.gap = max(1, min_days_between)
+        self.counts = Counter()  # Posts on each day, fixed and placed
+        self.pinned = []         # Sorted distinct days of fixed posts
+        self.last = None         # Latest day given to a placed post
+
+    def pin(self, day):
+        """Count a post that keeps its day. Call seal() once all pins are in."""
+        self.counts[day] += 1
+
+    def seal(self):
+        self.pinned = sorted(self.counts)
+
+    def conflict(self, day):
+        """A used day closer than the minimum gap to `day` (other than `day` itself), or None."""
+        if self.gap == 1:
+            return None
+        if self.last is not None and self.last != day and day - self.last < self.gap:
+            return self.last
+        i = bisect_left(self.pinned, day - self.gap + 1)
+        while i < len(self.pinned) and self.pinned[i] < day + self.gap:
+            if self.pinned[i] != day:
+                return self.pinned[i]
+            i += 1
+        return None
+
+    def place(self, earliest):
+        """Take the first day at or after `earliest` that keeps the lane within its rules."""
+        # Earlier placements had no later earliest day, so nothing before
+        # the frontier can have freed up
+        day = earliest if self.last is None else max(earliest, self.last)
+        while True:
+            if self.counts[day] >= self.cap:
+                day += 1
+                continue
+            used = self.conflict(day)
+            if used is None:
+                break
+            # Move past a used day behind us, or try sharing one ahead
+            day = used + self.gap if used < day else used
+
+        self.counts[day] += 1
+        if self.last is None or day > self.last:
+            self.last = day
+        return day
+
+
+class Scheduler:
+    """Assigns Date and Queue Position to Content Calendar posts under the scheduling rules."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.lanes = {}
+        self.over_cap = []  # (lane, date) where fixed posts alone exceed the daily cap
+
+    def lane(self, key):
+        lane = self.lanes.get(key)
+        if lane is None:
+            rule = {**self.rules["default"], **self.rules["accounts"].get(key[0], {})}
+            lane = self.lanes[key] = Lane(rule["dailyCap"], rule["minDaysBetween"])
+        return lane
+
+    def schedule(self, records):
+        """
+        Schedule compact records. Returns {record id: (day, queue position)}
+        for every post in a lane that has (or, for reposts, inherits) a date.
+        Original posts keep their day; pinned posts aren't included, they keep
+        their date and queue position and take the first positions of their day.
+        """
+        posts = {}
+        for record in records:
+            fields = record.fields
+            key = (fields.get("Posting Account"), fields.get("Platform"))
+            if not all(key):
+                continue
+            posts[record.id] = (
+                key,
+                to_day(fields.get("Date")),
+                fields.get("Post Status") in self.rules["pinnedStatuses"],
+                first(fields.get("Source Post")),
+                fields.get("Queue Position"),
+            )
+
+        # Reposts wait for their source to be placed; reposts of a source
+        # that never will be (undated, or closing a loop of reposts) go on
+        # their own date
+        placeable = {}
+
+        def will_place(record_id, seen=()):
+            if record_id not in placeable:
+                _, day, pinned, source, _ = posts[record_id]
+                if source in seen:
+                    placeable[record_id] = False
+                elif pinned or source not in posts:
+                    placeable[record_id] = day is not None
+                else:
+                    placeable[record_id] = will_place(source, (*seen, record_id)) or day is not None
+            return placeable[record_id]
+
+        reposts = defaultdict(list)
+        waiting = set()
+        for record_id, (_, day, pinned, source, _) in posts.items():
+            if source in posts and not pinned and will_place(source):
+                reposts[source].append(record_id)
+                waiting.add(record_id)
+
+        delay = self.rules["repostDelayDays"]
+        order = count()
+        heap = []
+        placed = {}
+
+        def push(record_id, day):
+            # Ties go to posts already on that day, so a rerun leaves the schedule alone
+            _, current, _, _, queued = posts[record_id]
+            heapq.heappush(heap, (day, current != day, queued if isinstance(queued, int) else 0,
+                                  next(order), record_id))
+
+        def release(record_id, day):
+            for repost_id in reposts.pop(record_id, ()):
+                current = posts[repost_id][1]
+                push(repost_id, day + delay if current is None else max(current, day + delay))
+
+        # Pinned posts and originals keep their day
+        for record_id, (key, day, pinned, source, _) in posts.items():
+            if (pinned or source is None) and day is not None:
+                self.lane(key).pin(day)
+                placed[record_id] = day
+        for key, lane in self.lanes.items():
+            lane.seal()
+            self.over_cap += [(key, from_day(day)) for day, n in lane.counts.items() if n > lane.cap]
+        for record_id, day in list(placed.items()):
+            release(record_id, day)
+
+        for record_id, (_, day, pinned, source, _) in posts.items():
+            if day is not None and not pinned and source is not None and record_id not in waiting:
+                push(record_id, day)
+
+        while heap:
+            earliest, *_, record_id = heapq.heappop(heap)
+            day = self.lane(posts[record_id][0]).place(earliest)
+            placed[record_id] = day
+            release(record_id, day)
+
+        # Queue Position: pinned posts first, then by previous position and scheduling order
+        slots = defaultdict(list)
+        for record_id, day in placed.items():
+            key, _, pinned, _, queued = posts[record_id]
+            slots[key, day].append((not pinned, queued if isinstance(queued, int) else 0, record_id))
+        schedule = {}
+        for (_, day), slot in slots.items():
+            for position, (unpinned, _, record_id) in enumerate(sorted(slot, key=lambda s: s[:2]), 1):
+                if unpinned:
+                    schedule[record_id] = (day, position)
+        return schedule
+
+    def changes(self, records):
+        """{"id", "fields"} updates holding only the Date/Queue Position values that change."""
+        records = list(records)
+        schedule = self.schedule(records)
+        updates = []
+        for record in records:
+            if record.id not in schedule:
+                continue
+            day, position = schedule[record.id]
+            fields = {}
+            if to_day(record.fields.get("Date")) != day:
+                fields["Date"] = from_day(day)
+            if record.fields.get("Queue Position") != position:
+                fields["Queue Position"] = position
+            if fields:
+                updates.append({"id": record.id, "fields": fields})
+        return updates
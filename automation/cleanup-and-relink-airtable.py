@@ -4,27 +4,40 @@ Cleanup Airtable Database and Relink All Records
 
 Steps:
 1. Delete duplicate from Basic Info
-2. Clear all detail tables (Services, Workforce, Marketing, etc.)
+2. Clear all detail tables (Services, Workforce, Marketing, etc.) concurrently
 3. Keep Basic Info records (10 competitors)
-4. Re-run linked loader to create properly linked detail records
+4. Recreate the detail records from payload files, linked to Basic Info by
+   competitor name (airtable_relink.py)
+
+Run with: python3 cleanup-and-relink-airtable.py [--mirror] [--payloads DIR]
+
+--payloads DIR holds one file per detail table (services.json or
+services.ndjson, workforce.json, ...) of field dicts whose "Competitor" field
+names the competitor. Basic Info is indexed once by normalized name and the
+payloads are joined against it locally; rows that match no competitor (or
+more than one) are written to .cache/relink/ instead of being sent.
+
+--mirror counts Basic Info from the local SQLite mirror (airtable_mirror.py)
+and drops the cleared detail tables from it, keeping the mirror consistent.
 """
 
 import os
-import requests
-import json
+import pathlib
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from airtable_client import AirtableClient, AirtableError
+from airtable_mirror import AirtableMirror
+from airtable_relink import build_name_index, load_payloads, relink, write_orphans
 
-AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
-AIRTABLE_BASE_ID = os.getenv('AIRTABLE_BASE_ID')
-BASE_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}"
+# Load environment variables; AIRTABLE_ENV_FILE points at another env file
+# (the benchmarks use /dev/null)
+load_dotenv(os.getenv('AIRTABLE_ENV_FILE'))
 
-HEADERS = {
-    "Authorization": f"Bearer {AIRTABLE_API_KEY}",
-    "Content-Type": "application/json"
-}
+client = AirtableClient.from_env()
 
 # Table IDs - configure in .env or environment
 # Set AIRTABLE_TABLE_<NAME> environment variables for each table
@@ -42,78 +55,171 @@ TABLES = {
 # Duplicate record to delete (test record) - set via environment or argument
 BBG_DUPLICATE_ID = os.getenv('AIRTABLE_DUPLICATE_RECORD_ID', '')
 
+DETAIL_TABLES = ["services", "workforce", "marketing", "positioning", "swot", "ai_search", "messaging"]
+
+ORPHANS_DIR = pathlib.Path(__file__).parent.parent / ".cache" / "relink"
+
 
 def delete_record(table_id: str, record_id: str):
     """Delete a single record."""
-    url = f"{BASE_URL}/{table_id}/{record_id}"
-    response = requests.delete(url, headers=HEADERS)
-
-    if response.status_code == 200:
-        print(f"✅ Deleted record {record_id} from table {table_id}")
-        return True
-    else:
-        print(f"❌ Error deleting record: {response.status_code}")
-        print(f"   Response: {response.text}")
+    try:
+        client.delete_record(table_id, record_id)
+    except AirtableError as e:
+        print(f"❌ Error deleting record: {e.status_code}")
+        print(f"   Response: {e.error}")
         return False
 
-
-def get_all_records(table_id: str):
-    """Get all records from a table."""
-    url = f"{BASE_URL}/{table_id}"
-    all_records = []
-
-    params = {}
-    while True:
-        response = requests.get(url, headers=HEADERS, params=params)
-
-        if response.status_code != 200:
-            print(f"❌ Error fetching records: {response.status_code}")
-            return []
-
-        data = response.json()
-        all_records.extend(data.get('records', []))
-
-        # Check for pagination
-        offset = data.get('offset')
-        if not offset:
-            break
-        params['offset'] = offset
-
-    return all_records
-
-
-def delete_all_records_from_table(table_name: str, table_id: str):
-    """Delete all records from a table."""
-    print(f"\n📊 Processing table: {table_name}")
-
-    records = get_all_records(table_id)
-    print(f"   Found {len(records)} records")
-
-    if len(records) == 0:
-        print(f"   ✅ Table already empty")
-        return
+    print(f"✅ Deleted record {record_id} from table {table_id}")
+    return True
+
+
+def get_all_records(table_id: str, fields=None):
+    """Get all records from a table as compact records, optionally projected onto `fields` ([] for ids only)."""
+    try:
+        return client.get_all_records(table_id, fields=fields, compact=True)
+    except AirtableError as e:
+        print(f"❌ Error fetching records: {e.status_code}")
+        return []
+
+
+def truncate_tables(tables: dict):
+    """
+    Delete every record from several tables at once.
+
+    One reader thread per table pages ids (no field payload) into a shared
+    queue; each id goes to a single delete writer as soon as it arrives, so
+    deletes start with the first page. All tables share the client's rate
+    budget. Returns per-table stats.
+
+    Deleting while paginating can shift later pages, so each reader sweeps
+    its table again until a pass turns up no ids it hasn't already queued.
+    """
+    ids = queue.Queue(maxsize=1000)
+    done = object()
+    stats = {
+        table_id: {"name": name, "found": 0, "deleted": 0, "failed": 0, "read_error": None,
+                   "started": time.monotonic(), "finished": None}
+        for name, table_id in tables.items()
+    }
+
+    def read(table_id):
+        queued = set()
+        try:
+            while True:
+                new = 0
+                for record in client.iter_records(table_id, fields=[]):
+                    if record['id'] not in queued:
+                        queued.add(record['id'])
+                        ids.put((table_id, record['id']))
+                        new += 1
+                if not new:
+                    break
+        except AirtableError as e:
+            print(f"   ❌ Error fetching {stats[table_id]['name']}: {e.status_code}")
+            stats[table_id]["read_error"] = f"{e.status_code}: {e.error}"
+        except Exception as e:
+            print(f"   ❌ Error fetching {stats[table_id]['name']}: {e!r}")
+            stats[table_id]["read_error"] = repr(e)
+        finally:
+            # Always signal the end of this table, or the main loop waits forever
+            ids.put((table_id, done))
+
+    def report(results):
+        for result in results:
+            table = stats[result.table_id]
+            if result.error:
+                table["failed"] += len(result.items)
+                print(f"   ❌ Error deleting {table['name']} batch: {result.error.status_code}")
+                print(f"      {result.error.error}")
+            else:
+                table["deleted"] += len(result.records)
+            table["finished"] = time.monotonic()
+
+    writer = client.delete_writer()
+    readers = ThreadPoolExecutor(max_workers=len(tables))
+    for table_id in stats:
+        readers.submit(read, table_id)
 
     # Airtable allows deleting up to 10 records at once
-    for i in range(0, len(records), 10):
-        batch = records[i:i+10]
-        record_ids = [r['id'] for r in batch]
-
-        # Delete batch
-        params = "&".join([f"records[]={rid}" for rid in record_ids])
-        url = f"{BASE_URL}/{table_id}?{params}"
-
-        response = requests.delete(url, headers=HEADERS)
-
-        if response.status_code == 200:
-            print(f"   ✅ Deleted batch of {len(record_ids)} records")
-        else:
-            print(f"   ❌ Error deleting batch: {response.status_code}")
-            print(f"      {response.text}")
-
-    print(f"   ✅ Cleared {len(records)} records from {table_name}")
+    remaining = len(stats)
+    while remaining:
+        table_id, record_id = ids.get()
+        if record_id is done:
+            remaining -= 1
+            continue
+        stats[table_id]["found"] += 1
+        report(writer.add(table_id, record_id))
+
+    report(writer.close())
+    readers.shutdown()
+
+    for table in stats.values():
+        if table["finished"] is None:
+            table["finished"] = time.monotonic()
+    return stats
+
+
+def print_truncate_report(stats: dict):
+    """Per-table deleted counts and throughput."""
+    for table in stats.values():
+        elapsed = table["finished"] - table["started"]
+        rate = table["deleted"] / elapsed if elapsed > 0 else 0
+        status = "❌" if table["failed"] or table["read_error"] else "✅"
+        print(f"   {status} {table['name']:<12} deleted {table['deleted']:>6} / {table['found']:<6} "
+              f"in {elapsed:6.2f}s ({rate:,.0f} records/sec)")
+        if table["failed"]:
+            print(f"      {table['failed']} records failed to delete")
+        if table["read_error"]:
+            print(f"      Stopped reading early, so the table may not be empty: {table['read_error']}")
+
+
+def relink_details(payload_dir: str):
+    """Recreate the detail records from payload files, linked by competitor name."""
+    detail_tables = {name: TABLES[name] for name in DETAIL_TABLES}
+    names = {table_id: name for name, table_id in detail_tables.items()}
+
+    try:
+        index, ambiguous = build_name_index(client, TABLES["basic_info"])
+    except AirtableError as e:
+        print(f"❌ Error indexing Basic Info: {e.status_code}")
+        return {}
+    print(f"   Indexed {len(index)} competitors"
+          + (f" ({len(ambiguous)} names shared by several records)" if ambiguous else ""))
+
+    payloads = load_payloads(payload_dir, detail_tables)
+    missing = [name for name, table_id in detail_tables.items() if table_id not in payloads]
+    if missing:
+        print(f"   ⚠️  No payload file for: {', '.join(missing)}")
+
+    stats, orphans = relink(client, index, ambiguous, payloads)
+
+    for table_id, table in stats.items():
+        status = "❌" if table["failed"] else ("⚠️ " if table["orphans"] else "✅")
+        print(f"   {status} {names[table_id]:<12} created {table['created']:>6} / {table['payloads']:<6} "
+              f"({table['orphans']} orphans, {table['failed']} failed)")
+
+    if orphans:
+        path = ORPHANS_DIR / f"orphans-{client.base_id}.ndjson"
+        for orphan in orphans:
+            orphan["table"] = names[orphan["table"]]
+        write_orphans(orphans, path)
+        print(f"\n   {len(orphans)} payloads matched no single competitor; written to {path}")
+    return stats
 
 
 def main():
+    use_mirror = "--mirror" in sys.argv
+    mirror = AirtableMirror(client) if use_mirror else None
+
+    payload_dir = None
+    if "--payloads" in sys.argv:
+        i = sys.argv.index("--payloads")
+        payload_dir = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+        # Check before anything is deleted
+        if not payload_dir or not os.path.isdir(payload_dir):
+            print("❌ --payloads needs a directory of detail payload files")
+            sys.exit(1)
+
     print("🚀 Airtable Cleanup and Relink Script")
     print("=" * 60)
 
@@ -122,21 +228,53 @@ def main():
     delete_record(TABLES["basic_info"], BBG_DUPLICATE_ID)
 
     # Verify Basic Info count
-    basic_records = get_all_records(TABLES["basic_info"])
-    print(f"   Basic Info now has {len(basic_records)} competitors")
+    if mirror:
+        # Prune so the deleted duplicate drops out of the mirror too
+        mirror.refresh(TABLES["basic_info"], prune=True)
+        basic_count = mirror.count(TABLES["basic_info"])
+    else:
+        basic_count = len(get_all_records(TABLES["basic_info"], fields=[]))
+    print(f"   Basic Info now has {basic_count} competitors")
 
     # Step 2: Clear all detail tables
     print("\n📋 Step 2: Clear all detail tables")
-    detail_tables = ["services", "workforce", "marketing", "positioning", "swot", "ai_search", "messaging"]
-
-    for table_name in detail_tables:
-        delete_all_records_from_table(table_name, TABLES[table_name])
+    stats = truncate_tables({name: TABLES[name] for name in DETAIL_TABLES})
+    print_truncate_report(stats)
+    not_cleared = [table_id for table_id, table in stats.items() if table["failed"] or table["read_error"]]
+
+    if mirror:
+        # Tables that weren't fully cleared still hold rows the mirror should keep
+        for table_name in DETAIL_TABLES:
+            if TABLES[table_name] not in not_cleared:
+                mirror.clear(TABLES[table_name])
+        mirror.close()
+
+    # Step 3: Relink, only onto empty tables; relinking over leftover rows
+    # would duplicate them or link stale ones
+    relinked = {}
+    if payload_dir and not not_cleared:
+        print("\n📋 Step 3: Recreate linked detail records")
+        relinked = relink_details(payload_dir)
+
+    client.metrics.emit("cleanup-and-relink-airtable",
+                        records=sum(t["deleted"] for t in stats.values())
+                        + sum(t["created"] for t in relinked.values()),
+                        errors=sum(t["failed"] for t in stats.values())
+                        + sum(t["failed"] for t in relinked.values()))
+
+    if not_cleared:
+        names = ", ".join(stats[table_id]["name"] for table_id in not_cleared)
+        print(f"\n❌ Not all detail tables were cleared ({names})")
+        if payload_dir:
+            print("   Skipped relinking; rerun once the tables are empty")
+        sys.exit(1)
 
     print("\n" + "=" * 60)
-    print("✅ CLEANUP COMPLETE")
+    print("✅ CLEANUP AND RELINK COMPLETE" if payload_dir else "✅ CLEANUP COMPLETE")
     print("=" * 60)
-    print("\nNext step: Run the linked loader script to recreate detail records with proper linking")
-    print("Command: python3 automation/load-all-competitors-linked.py")
+    if not payload_dir:
+        print("\nNext step: recreate the detail records with proper linking by rerunning with")
+        print("--payloads DIR (one <table>.json or <table>.ndjson file per detail table)")
 
 
 if __name__ == "__main__":
@@ -7,31 +7,64 @@ This script migrates existing records to the new schema:
 2. Populates "Platform" from "Channels" (takes first value)
 3. Sets "Post Type" to "Original" by default
 4. Sets "Queue Position" to 1 by default
-
-Run with: python3 migrate-content-calendar.py [--dry-run]
+5. Creates a Company LinkedIn repost, repostDelayDays (config/airtable.json
+   "scheduling") later, for posts whose "Who to Post" lists Company alongside
+   a partner (skip with --skip-reposts)
+
+Queue positions and repost dates are placeholders until
+schedule-content-calendar.py spaces every account's posts out under the
+scheduling rules; run it after migrating.
+
+Both happen in a single streaming pass: updates and repost creates are sent
+in 10-record batches as they fill. Each row is first validated against the
+Content Calendar definition in config/airtable.json (airtable_schema.py);
+invalid rows go to .cache/quarantine/ instead of being sent.
+
+Run with: python3 migrate-content-calendar.py [--dry-run] [--skip-reposts] [--mirror [--prune]]
+          python3 migrate-content-calendar.py --snapshot | --plan | --apply [--skip-reposts]
+          python3 migrate-content-calendar.py --replay
+
+--mirror reads the table from the local SQLite mirror (airtable_mirror.py),
+refreshing it incrementally first, instead of re-downloading it. Records
+deleted in Airtable are pruned from the mirror every PRUNE_EVERY refreshes
+(a sweep of all record ids); add --prune to sweep now, so none are
+updated again.
+
+--snapshot downloads the table to a compressed NDJSON snapshot, --plan maps
+it offline into a write plan (updates and repost creates) without any
+requests, and --apply sends the plan in concurrent batches (airtable_plan.py).
+
+Rows Airtable rejects are isolated by bisecting their batch and appended to
+.cache/dead-letters/ (airtable_deadletter.py); --replay resends them once
+the data is fixed. Repost creates that failed with a 5xx or network error
+may already be in Airtable, so --replay leaves those for a manual check.
 """
 
 import os
 import sys
-import json
-import requests
+from datetime import datetime, timedelta
+from functools import lru_cache
 from dotenv import load_dotenv
 
-# Load environment variables from project root (override any existing)
+from airtable_client import MAX_PAGE_SIZE, AirtableClient, AirtableError, batched
+from airtable_deadletter import DeadLetterLog, possibly_applied, replay_dead_letters
+from airtable_mapping import load_mapping
+from airtable_mirror import PRUNE_EVERY, AirtableMirror
+from airtable_plan import (WritePlan, apply_plan, iter_snapshot, plan_path, read_plan,
+                           snapshot_path, write_snapshot)
+from airtable_records import compact_records
+from airtable_schema import Quarantine, ValidatingWriter, load_schema
+from calendar_scheduler import load_rules, report_updates
+
+# Load environment variables from project root (override any existing);
+# AIRTABLE_ENV_FILE points at another env file (migrate-fleet.py uses /dev/null)
 import pathlib
 project_root = pathlib.Path(__file__).parent.parent
-load_dotenv(project_root / '.env', override=True)
+load_dotenv(os.getenv('AIRTABLE_ENV_FILE', project_root / '.env'), override=True)
 
-AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
-AIRTABLE_BASE_ID = os.getenv('AIRTABLE_BASE_ID')
 TABLE_ID = os.getenv('AIRTABLE_CONTENT_TABLE_ID', 'YOUR_CONTENT_TABLE_ID')
 
-BASE_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{TABLE_ID}"
-
-HEADERS = {
-    "Authorization": f"Bearer {AIRTABLE_API_KEY}",
-    "Content-Type": "application/json"
-}
+client = AirtableClient.from_env()
 
 # Mapping from "Who to Post" values to "Posting Account" values
 # Customize for your brand's partners and posting accounts
@@ -46,208 +79,343 @@ PLATFORM_MAP = {
     "Instagram": "Instagram",
     "Facebook": "Facebook",
     "TikTok": "TikTok",
-    "X": "X",
+    "X": "X/Twitter",
+    "Twitter": "X/Twitter",
 }
 
+# Fields filled in by the contentCalendarMigration mapping in config/airtable.json
+MIGRATION_MAPPER = load_mapping("contentCalendarMigration", {
+    "whoToAccount": WHO_TO_ACCOUNT_MAP,
+    "platformMap": PLATFORM_MAP,
+})
+
+# Content Calendar definition from config/airtable.json, checked before each write
+SCHEMAS = {TABLE_ID: load_schema("contentCalendar")}
+
+# Only the fields the migration and repost pass read (skips long "Copy" text)
+FETCH_FIELDS = [
+    "Who to Post", "Channels", "Posting Account", "Platform", "Post Type",
+    "Queue Position", "Date", "Post Topic", "Content Pillar", "Focus",
+]
+
+# Server-side filters: records still missing the new fields, and dated
+# posts that list Company alongside someone else (checked again locally)
+NEEDS_MIGRATION_FORMULA = "OR({Posting Account} = BLANK(), {Platform} = BLANK())"
+REPOST_SOURCE_FORMULA = 'AND({Date}, FIND("Company", {Who to Post}), FIND(",", {Who to Post}))'
+
+# Company reposts of partner content go out at least this long after the original
+REPOST_DELAY = timedelta(days=load_rules()["repostDelayDays"])
+
+
+def iter_records(formula=None, use_mirror=False, from_snapshot=False):
+    """
+    Stream Content Calendar records, or read them from the refreshed local
+    mirror or the --snapshot file. Neither can evaluate `formula`; callers
+    re-check locally.
+    """
+    try:
+        if from_snapshot:
+            path = snapshot_path(TABLE_ID, client.base_id)
+            if not path.exists():
+                print(f"No snapshot at {path}; run with --snapshot first")
+                sys.exit(1)
+            yield from compact_records(iter_snapshot(path), FETCH_FIELDS)
+        elif use_mirror:
+            with AirtableMirror(client) as mirror:
+                changed = mirror.refresh(TABLE_ID, prune="--prune" in sys.argv, prune_every=PRUNE_EVERY)
+                print(f"Mirror refreshed ({changed} changed records)")
+                yield from mirror.records(TABLE_ID, fields=FETCH_FIELDS, compact=True)
+        else:
+            yield from client.iter_records(TABLE_ID, fields=FETCH_FIELDS, formula=formula, compact=True,
+                                           shards=client.read_shards)
+    except AirtableError as e:
+        print(f"Error fetching records: {e.error}")
+        sys.exit(1)
 
-def get_all_records():
-    """Fetch all records from the Content Calendar table."""
-    records = []
-    offset = None
-
-    while True:
-        params = {"pageSize": 100}
-        if offset:
-            params["offset"] = offset
-
-        response = requests.get(BASE_URL, headers=HEADERS, params=params)
-        data = response.json()
-
-        if "error" in data:
-            print(f"Error fetching records: {data['error']}")
-            sys.exit(1)
-
-        records.extend(data.get("records", []))
-        offset = data.get("offset")
-
-        if not offset:
-            break
-
-    return records
-
-
-def determine_posting_account(who_to_post):
-    """Map 'Who to Post' value(s) to 'Posting Account'."""
-    if not who_to_post:
-        return "Company LinkedIn"  # Default
 
-    # who_to_post is a list (multiselect)
-    if isinstance(who_to_post, list) and len(who_to_post) > 0:
-        first_person = who_to_post[0]
-        return WHO_TO_ACCOUNT_MAP.get(first_person, "Company LinkedIn")
+def migrate_page(records, dry_run=False):
+    """
+    Build the schema-migration updates for a page of records.
 
-    return "Company LinkedIn"
+    Returns a list of {"id", "fields"} for records that need updating; records
+    already migrated are left out. Updates are sent in bulk through the
+    client's update writer.
+    """
+    # Already migrated when both new fields are populated
+    pending = [r for r in records
+               if not (r.get("fields", {}).get("Posting Account") and r.get("fields", {}).get("Platform"))]
+    mapped = MIGRATION_MAPPER.map_page([r.get("fields", {}) for r in pending])
 
+    updates = []
+    for record, update_fields in zip(pending, mapped):
+        if not update_fields:
+            continue  # Nothing to update
 
-def determine_platform(channels):
-    """Map 'Channels' value(s) to 'Platform'."""
-    if not channels:
-        return "LinkedIn"  # Default
+        if dry_run:
+            fields = record.get("fields", {})
+            print(f"  Would update record {record['id']}:")
+            print(f"    Who to Post: {fields.get('Who to Post', [])}, Channels: {fields.get('Channels', [])}")
+            print(f"    -> {update_fields}")
 
-    # channels is a list (multiselect)
-    if isinstance(channels, list) and len(channels) > 0:
-        first_channel = channels[0]
-        return PLATFORM_MAP.get(first_channel, "LinkedIn")
+        updates.append({"id": record["id"], "fields": update_fields})
 
-    return "LinkedIn"
+    return updates
 
 
-def migrate_record(record, dry_run=False):
-    """Migrate a single record to the new schema."""
-    record_id = record["id"]
+def needs_repost(record):
+    """True when Who to Post has both Company and a partner, and the post is dated."""
     fields = record.get("fields", {})
-
-    # Get existing values
     who_to_post = fields.get("Who to Post", [])
-    channels = fields.get("Channels", [])
-
-    # Check if already migrated (has new fields populated)
-    if fields.get("Posting Account") and fields.get("Platform"):
-        return None  # Already migrated
-
-    # Determine new values
-    posting_account = determine_posting_account(who_to_post)
-    platform = determine_platform(channels)
 
-    # Build update payload
-    update_fields = {}
+    # Check if this record has both a partner and Company
+    if isinstance(who_to_post, (list, tuple)) and len(who_to_post) > 1:
+        has_company = "Company" in who_to_post
+        partners = [p for p in who_to_post if p != "Company"]
+        return has_company and bool(partners) and bool(fields.get("Date"))
 
-    if not fields.get("Posting Account"):
-        update_fields["Posting Account"] = posting_account
+    return False
 
-    if not fields.get("Platform"):
-        update_fields["Platform"] = platform
 
-    if not fields.get("Post Type"):
-        update_fields["Post Type"] = "Original"
+@lru_cache(maxsize=None)
+def repost_date(date):
+    """Repost date for an original post date; cached since calendars reuse dates heavily."""
+    return (datetime.strptime(date, "%Y-%m-%d") + REPOST_DELAY).strftime("%Y-%m-%d")
 
-    if not fields.get("Queue Position"):
-        update_fields["Queue Position"] = 1
 
-    if not update_fields:
-        return None  # Nothing to update
-
-    if dry_run:
-        print(f"  Would update record {record_id}:")
-        print(f"    Who to Post: {who_to_post} -> Posting Account: {posting_account}")
-        print(f"    Channels: {channels} -> Platform: {platform}")
-        return {"dry_run": True, "fields": update_fields}
-
-    # Perform the update
-    response = requests.patch(
-        f"{BASE_URL}/{record_id}",
-        headers=HEADERS,
-        json={"fields": update_fields}
-    )
-
-    result = response.json()
-    if "error" in result:
-        print(f"  Error updating {record_id}: {result['error']}")
-        return None
-
-    return result
-
-
-def create_repost_records(records, dry_run=False):
-    """Create repost records for posts where Who to Post has Company and another person."""
-    reposts_to_create = []
-
-    for record in records:
-        fields = record.get("fields", {})
-        who_to_post = fields.get("Who to Post", [])
-
-        # Check if this record has both a partner and Company
-        if isinstance(who_to_post, list) and len(who_to_post) > 1:
-            has_company = "Company" in who_to_post
-            partners = [p for p in who_to_post if p != "Company"]
-
-            if has_company and partners:
-                # This record needs a repost created
-                date = fields.get("Date")
-                if date:
-                    # Calculate repost date (2 days later)
-                    from datetime import datetime, timedelta
-                    original_date = datetime.strptime(date, "%Y-%m-%d")
-                    repost_date = original_date + timedelta(days=2)
-
-                    repost = {
-                        "Date": repost_date.strftime("%Y-%m-%d"),
-                        "Post Topic": fields.get("Post Topic", ""),
-                        "Posting Account": "Company LinkedIn",
-                        "Platform": "LinkedIn",
-                        "Post Type": "Repost",
-                        "Copy": "NATIVE SHARE",
-                        "Post Status": "Drafting",
-                        "Content Pillar": fields.get("Content Pillar"),
-                        "Focus": fields.get("Focus"),
-                        "Source Post": [record["id"]],  # Link to original
-                        "Queue Position": 1,
-                        "Notes": f"Auto-created repost of partner content"
-                    }
-                    reposts_to_create.append(repost)
-
-    if dry_run:
-        print(f"\nWould create {len(reposts_to_create)} repost records")
-        for repost in reposts_to_create[:5]:  # Show first 5
-            print(f"  - {repost['Date']}: Repost of '{repost['Post Topic'][:50]}...'")
-        return reposts_to_create
-
-    # Create repost records in batches of 10
+def build_repost(record):
+    """Fields for the Company repost of a partner post (see needs_repost)."""
+    fields = record.get("fields", {})
+    return {
+        "Date": repost_date(fields["Date"]),
+        "Post Topic": fields.get("Post Topic", ""),
+        "Posting Account": "Company LinkedIn",
+        "Platform": "LinkedIn",
+        "Post Type": "Repost",
+        "Copy": "NATIVE SHARE",
+        "Post Status": "Drafting",
+        "Content Pillar": fields.get("Content Pillar"),
+        "Focus": fields.get("Focus"),
+        "Source Post": [record["id"]],  # Link to original
+        "Queue Position": 1,
+        "Notes": "Auto-created repost of partner content",
+    }
+
+
+def report_reposts(results):
+    """
+    Print outcomes of repost create batches from the keyed create writer.
+    Returns (created_count, failed_source_ids).
+    """
     created = 0
-    for i in range(0, len(reposts_to_create), 10):
-        batch = reposts_to_create[i:i+10]
-        response = requests.post(
-            BASE_URL,
-            headers=HEADERS,
-            json={"records": [{"fields": r} for r in batch]}
-        )
-        result = response.json()
-        if "records" in result:
-            created += len(result["records"])
+    failed = []
 
-    print(f"Created {created} repost records")
-    return created
+    for result in results:
+        source_ids = [source_id for source_id, _ in result.items]
+        if result.error:
+            print(f"  Error creating reposts of {', '.join(source_ids)}: {result.error.error}")
+            failed.extend(source_ids)
+        else:
+            created += len(result.records)
+            print(f"  Created {len(result.records)} repost records")
+
+    return created, failed
+
+
+def apply(dead_letters):
+    """Execute the write plan from --plan. Returns (updated, failed, created, repost_failed)."""
+    path = plan_path("migrate-content-calendar", client.base_id)
+    if not path.exists():
+        print(f"No write plan at {path}; run with --plan first")
+        sys.exit(1)
+    header = read_plan(path)
+    if header["base"] != client.base_id:
+        print(f"Plan {path} was made for base {header['base']}, not {client.base_id}")
+        sys.exit(1)
+
+    print(f"Applying plan from {header['created_at']} ({path})...")
+    return report_ops(apply_plan(client, path, dead_letter=dead_letters))
+
+
+def replay(dead_letters):
+    """Resend dead-lettered rows from earlier runs. Returns (updated, failed, created, repost_failed)."""
+    if not dead_letters.path.exists():
+        print(f"No dead letters at {dead_letters.path}")
+        return 0, [], 0, []
+    print(f"Replaying dead letters from {dead_letters.path}...")
+    results = report_ops(replay_dead_letters(client, dead_letters.path))
+    # Reposts have no key to upsert on, so creates Airtable may have applied aren't resent
+    held = possibly_applied(dead_letters.path)
+    if held:
+        print(f"  {held} repost creates may already exist in Airtable and were not resent; "
+              f"check them, then remove \"possiblyApplied\" from their lines in {dead_letters.path}")
+    return results
+
+
+def report_ops(ops):
+    """Tally (op, BatchResult) pairs from a plan or replay: updates and repost creates."""
+    updated = created = 0
+    failed = []
+    reposts_failed = []
+    for op, result in ops:
+        if op == "update":
+            count, errors = report_updates([result])
+            updated += count
+            failed += errors
+        else:
+            count, errors = report_reposts([result])
+            created += count
+            reposts_failed += errors
+    return updated, failed, created, reposts_failed
 
 
 def main():
     dry_run = "--dry-run" in sys.argv
     skip_reposts = "--skip-reposts" in sys.argv
+    use_mirror = "--mirror" in sys.argv
+    plan_only = "--plan" in sys.argv
+
+    if "--snapshot" in sys.argv:
+        try:
+            path, count = write_snapshot(client, TABLE_ID, FETCH_FIELDS)
+        except AirtableError as e:
+            print(f"Error snapshotting Content Calendar: {e.error}")
+            sys.exit(1)
+        print(f"Snapshot of {count} Content Calendar records → {path}")
+        client.metrics.emit("migrate-content-calendar-snapshot", records=count)
+        return
+
+    dead_letters = DeadLetterLog.for_script("migrate-content-calendar", client.base_id)
+
+    if "--apply" in sys.argv or "--replay" in sys.argv:
+        stage = "apply" if "--apply" in sys.argv else "replay"
+        updated, failed, created, reposts_failed = apply(dead_letters) if stage == "apply" else replay(dead_letters)
+        dead_letters.close()
+        print(f"\n{'Plan applied' if stage == 'apply' else 'Replay complete'}:")
+        print(f"  Migrated: {updated}")
+        print(f"  Created {created} repost records")
+        if failed:
+            print(f"  Failed: {len(failed)}")
+        if reposts_failed:
+            print(f"  Failed to create {len(reposts_failed)} repost records")
+        if failed or reposts_failed:
+            print(f"  Rejected rows are in {dead_letters.path}")
+        client.metrics.emit(f"migrate-content-calendar-{stage}", records=updated + created,
+                            errors=len(failed) + len(reposts_failed))
+        return
 
     if dry_run:
         print("=== DRY RUN MODE - No changes will be made ===\n")
 
-    print("Fetching all records from Content Calendar...")
-    records = get_all_records()
-    print(f"Found {len(records)} records\n")
-
-    print("Migrating records to new schema...")
+    print("Streaming records from Content Calendar and migrating to new schema...")
     migrated = 0
     skipped = 0
-
-    for record in records:
-        result = migrate_record(record, dry_run)
-        if result:
-            migrated += 1
-        else:
-            skipped += 1
+    failed = []
+
+    # One pass: each page is mapped into updates and scanned for repost
+    # sources, and both writers send their batches as soon as they fill
+    plan = None
+    if plan_only:
+        # Same items as the live writers, recorded in the plan instead of sent
+        plan = WritePlan(plan_path("migrate-content-calendar", client.base_id), "migrate-content-calendar",
+                         client.base_id, [snapshot_path(TABLE_ID, client.base_id)])
+        writer = plan.writer("update")
+        repost_writer = None if skip_reposts else plan.writer("create", keyed=True)
+    else:
+        writer = client.update_writer(dead_letter=dead_letters)
+        repost_writer = None if skip_reposts else client.create_writer(keyed=True, dead_letter=dead_letters)
+
+    quarantine = Quarantine.for_script("migrate-content-calendar", client.base_id)
+    writer = ValidatingWriter(writer, SCHEMAS, quarantine, "update")
+    if repost_writer:
+        repost_writer = ValidatingWriter(repost_writer, SCHEMAS, quarantine, "create", keyed=True)
+    invalid = 0
+    reposts = 0
+    reposts_created = 0
+    reposts_failed = []
+    repost_preview = []
+
+    formula = NEEDS_MIGRATION_FORMULA
+    if not skip_reposts:
+        formula = f"OR({NEEDS_MIGRATION_FORMULA}, {REPOST_SOURCE_FORMULA})"
+
+    for page in batched(iter_records(formula, use_mirror, plan_only), MAX_PAGE_SIZE):
+        if repost_writer:
+            for record in page:
+                if not needs_repost(record):
+                    continue
+                repost = build_repost(record)
+                reposts += 1
+                if dry_run:
+                    invalid += bool(repost_writer.problems(TABLE_ID, (record["id"], repost)))
+                    if len(repost_preview) < 5:  # Show first 5
+                        repost_preview.append(repost)
+                    continue
+                created, errors = report_reposts(repost_writer.add(TABLE_ID, (record["id"], repost)))
+                reposts_created += created
+                reposts_failed += errors
+
+        updates = migrate_page(page, dry_run)
+        skipped += len(page) - len(updates)
+        if dry_run:
+            for update in updates:
+                problems = writer.problems(TABLE_ID, update)
+                if problems:
+                    invalid += 1
+                    print(f"  ⚠️  Would quarantine {update['id']}: {'; '.join(problems)}")
+            migrated += len(updates)
+            continue
+
+        for update in updates:
+            updated, errors = report_updates(writer.add(TABLE_ID, update))
+            migrated += updated
+            failed += errors
+
+    updated, errors = report_updates(writer.close())
+    migrated += updated
+    failed += errors
+    if repost_writer:
+        created, errors = report_reposts(repost_writer.close())
+        reposts_created += created
+        reposts_failed += errors
+    quarantine.close()
+    dead_letters.close()
+
+    if plan:
+        plan.close()
+        counts = {op: n for (op, _), n in plan.counts.items()}
+        print(f"\nWrote plan to {plan.path}:")
+        print(f"  Updates: {counts.get('update', 0)}")
+        print(f"  Repost creates: {counts.get('create', 0)}")
+        if quarantine:
+            print(f"  Quarantined (failed validation): {len(quarantine)} → {quarantine.path}")
+        client.metrics.emit("migrate-content-calendar-plan", records=skipped + counts.get("update", 0),
+                            quarantined=len(quarantine))
+        return
 
     print(f"\nMigration complete:")
     print(f"  Migrated: {migrated}")
     print(f"  Skipped (already done or empty): {skipped}")
+    if failed:
+        print(f"  Failed: {len(failed)}")
+    if quarantine or invalid:
+        print(f"  Quarantined (failed validation): {len(quarantine) or invalid}"
+              + (f" → {quarantine.path}" if quarantine else ""))
+    if len(dead_letters):
+        print(f"  Dead-lettered: {len(dead_letters)} → {dead_letters.path} (fix, then rerun with --replay)")
 
     if not skip_reposts:
-        print("\nChecking for repost records to create...")
-        create_repost_records(records, dry_run)
+        if dry_run:
+            print(f"\nWould create {reposts} repost records")
+            for repost in repost_preview:
+                print(f"  - {repost['Date']}: Repost of '{repost['Post Topic'][:50]}...'")
+        else:
+            print(f"\nCreated {reposts_created} repost records")
+            if reposts_failed:
+                print(f"Failed to create {len(reposts_failed)} repost records")
+
+    # A dry run only previews validation, so nothing counts as quarantined
+    client.metrics.emit("migrate-content-calendar", records=migrated + skipped + len(failed),
+                        errors=len(failed) + len(reposts_failed), quarantined=len(quarantine))
 
     if dry_run:
         print("\n=== DRY RUN COMPLETE - Run without --dry-run to apply changes ===")
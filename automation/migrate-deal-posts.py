@@ -7,35 +7,92 @@ Mapping:
 - Practice Area = "Commercial Banking" or "Commercial Leasing" → Commercial Deals table
 - Attorney with Deal Type = "Leasing" → Commercial Deals (Commercial Leasing)
 
-Run with: python3 migrate-deal-posts.py [--dry-run]
+Target fields are built by the residentialDeals/commercialDeals mappings in
+config/airtable.json (airtable_mapping.py), using the rule tables below.
+
+Run with: python3 migrate-deal-posts.py [--dry-run] [--mirror [--prune]] [--resume | --fresh] [--upsert]
+          python3 migrate-deal-posts.py --snapshot | --plan | --apply [--upsert] [--resume | --fresh]
+          python3 migrate-deal-posts.py --replay
+
+--mirror reads Deal Posts from the local SQLite mirror (airtable_mirror.py),
+refreshing it incrementally first, instead of re-downloading the table.
+Records deleted in Airtable are pruned from the mirror every PRUNE_EVERY
+refreshes (a sweep of all record ids); add --prune to sweep now, so none are
+migrated again.
+
+Every created batch is checkpointed to .cache/journals/ (airtable_journal.py).
+After a crash, --resume skips source records the journal already covers
+instead of creating them again. A run that would write refuses to start while
+the journal from an earlier run exists, unless given --resume or --fresh;
+--fresh moves the old journal aside and starts a new one.
+
+--upsert makes reruns idempotent. The target tables are first read into an
+in-memory index keyed on Deal Description + Attorney + Deal Value
+(whitespace/case-normalized). Rows already there unchanged are skipped,
+changed rows are updated by id, and missing rows are sent with Airtable's
+performUpsert merging on the same fields, so even a stale index can't
+create duplicates.
+
+Every row is validated locally against the table definitions in
+config/airtable.json (airtable_schema.py) before it's sent; rows with
+unknown fields, invalid select options, wrong types or missing required
+fields are written to .cache/quarantine/ instead of failing their batch.
+
+If Airtable still rejects a batch, it is bisected until the offending rows
+are found; the rest are written and the rejected rows are appended to
+.cache/dead-letters/ (airtable_deadletter.py). Fix the data, then --replay
+sends them again and keeps only the rows that fail a second time. Creates
+that failed with a 5xx or network error may already be in Airtable, so
+--replay sends those as upserts on the deal key instead.
+
+The migration can also run in three stages (airtable_plan.py):
+  --snapshot  download Deal Posts (and with --upsert the target tables) to
+              compressed NDJSON snapshots under .cache/snapshots/
+  --plan      map the snapshots offline into a write plan under .cache/plans/;
+              no requests are made, so it can be rerun and inspected freely
+  --apply     send the plan's writes in concurrent batches, journaled as
+              above (--resume skips plan entries the journal already covers)
 """
 
 import os
 import sys
-import json
-import requests
 from dotenv import load_dotenv
 import pathlib
 
-# Load environment variables from project root (override any existing)
+from airtable_client import MAX_PAGE_SIZE, AirtableClient, AirtableError, batched, clean_fields
+from airtable_deadletter import DeadLetterLog, replay_dead_letters
+from airtable_journal import MigrationJournal
+from airtable_mapping import load_mapping
+from airtable_mirror import PRUNE_EVERY, AirtableMirror
+from airtable_plan import (WritePlan, apply_plan, iter_snapshot, plan_path, read_plan,
+                           snapshot_path, write_snapshot)
+from airtable_records import compact_records
+from airtable_schema import Quarantine, ValidatingWriter, load_schema
+
+# Load environment variables from project root (override any existing);
+# AIRTABLE_ENV_FILE points at another env file (migrate-fleet.py uses /dev/null)
 project_root = pathlib.Path(__file__).parent.parent
-load_dotenv(project_root / '.env', override=True)
-
-AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
-AIRTABLE_BASE_ID = os.getenv('AIRTABLE_BASE_ID')
+load_dotenv(os.getenv('AIRTABLE_ENV_FILE', project_root / '.env'), override=True)
 
 # Table IDs - configure in .env or environment
 OLD_TABLE_ID = os.getenv('AIRTABLE_DEAL_POSTS_TABLE_ID', 'YOUR_DEAL_POSTS_TABLE_ID')
 RESIDENTIAL_TABLE_ID = os.getenv('AIRTABLE_RESIDENTIAL_TABLE_ID', 'YOUR_RESIDENTIAL_TABLE_ID')
 COMMERCIAL_TABLE_ID = os.getenv('AIRTABLE_COMMERCIAL_TABLE_ID', 'YOUR_COMMERCIAL_TABLE_ID')
 
-BASE_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}"
-
-HEADERS = {
-    "Authorization": f"Bearer {AIRTABLE_API_KEY}",
-    "Content-Type": "application/json"
+TABLE_NAMES = {
+    OLD_TABLE_ID: "Deal Posts",
+    RESIDENTIAL_TABLE_ID: "Residential Deals",
+    COMMERCIAL_TABLE_ID: "Commercial Deals",
 }
 
+client = AirtableClient.from_env()
+
+# Deal Posts fields read by the mappers below
+SOURCE_FIELDS = [
+    "Deal Description", "Deal Type", "Deal Value", "Property Type", "Location",
+    "Practice Area", "Attorney", "Client Represented", "Post Status", "Post Copy", "Notes",
+]
+
 # Property type mapping (old → new)
 RESIDENTIAL_PROPERTY_MAP = {
     "Residential": "Single Family",  # Generic residential
@@ -56,31 +113,146 @@ COMMERCIAL_PROPERTY_MAP = {
     "Medical": "Medical",
 }
 
+# Old post status → new workflow status
+POST_STATUS_MAP = {
+    "Raw Info": "Raw Info",
+    "Draft": "Draft",
+    "Ready for Review": "Draft",
+    "Approved": "Ready for Calendar",
+    "Posted": "Posted",
+}
+
+# Deal Value thresholds → Deal Tier (Commercial Deals)
+DEAL_TIERS = [
+    (5000000, "Enterprise ($5M+)"),
+    (1000000, "Standard ($1-5M)"),
+    (0, "Grassroots (<$1M)"),
+]
+
+# Field mappings live in config/airtable.json "mappings"; compiled once here
+MAPPING_RULES = {
+    "residentialPropertyMap": RESIDENTIAL_PROPERTY_MAP,
+    "commercialPropertyMap": COMMERCIAL_PROPERTY_MAP,
+    "postStatusMap": POST_STATUS_MAP,
+    "dealTiers": DEAL_TIERS,
+}
 
-def get_all_records(table_id):
-    """Fetch all records from a table."""
-    records = []
-    offset = None
+TARGETS = {
+    "residential": (RESIDENTIAL_TABLE_ID, load_mapping("residentialDeals", MAPPING_RULES)),
+    "commercial": (COMMERCIAL_TABLE_ID, load_mapping("commercialDeals", MAPPING_RULES)),
+}
+
+# Target table definitions from config/airtable.json, checked before each write
+SCHEMAS = {
+    RESIDENTIAL_TABLE_ID: load_schema("residentialDeals"),
+    COMMERCIAL_TABLE_ID: load_schema("commercialDeals"),
+}
 
-    while True:
-        params = {"pageSize": 100}
-        if offset:
-            params["offset"] = offset
+# --upsert: a deal's identity in the target tables (at most 3 for performUpsert)
+MERGE_FIELDS = ["Deal Description", "Attorney", "Deal Value"]
 
-        response = requests.get(f"{BASE_URL}/{table_id}", headers=HEADERS, params=params)
-        data = response.json()
 
-        if "error" in data:
-            print(f"Error fetching records: {data['error']}")
+def snapshot_file(table_id):
+    """Path of a table's snapshot; exits if --snapshot hasn't been run."""
+    path = snapshot_path(table_id, client.base_id)
+    if not path.exists():
+        print(f"No snapshot of {TABLE_NAMES[table_id]} at {path}; run with --snapshot first")
+        sys.exit(1)
+    return path
+
+
+def take_snapshots(tables):
+    """Snapshot each (table_id, fields) pair for a later --plan."""
+    for table_id, fields in tables:
+        try:
+            path, count = write_snapshot(client, table_id, fields)
+        except AirtableError as e:
+            print(f"Error snapshotting {TABLE_NAMES[table_id]}: {e.error}")
             sys.exit(1)
+        print(f"  {TABLE_NAMES[table_id]}: {count} records → {path}")
+
+
+def iter_records(table_id, use_mirror=False, from_snapshot=False):
+    """
+    Stream records from a table, its refreshed local mirror, or its snapshot.
+    Raises AirtableError when a read fails, so the caller can still collect
+    and journal the batches already in flight before exiting.
+    """
+    if from_snapshot:
+        yield from compact_records(iter_snapshot(snapshot_file(table_id)), SOURCE_FIELDS)
+    elif use_mirror:
+        with AirtableMirror(client) as mirror:
+            changed = mirror.refresh(table_id, prune="--prune" in sys.argv, prune_every=PRUNE_EVERY)
+            print(f"Mirror refreshed ({changed} changed records)")
+            yield from mirror.records(table_id, fields=SOURCE_FIELDS, compact=True)
+    else:
+        yield from client.iter_records(table_id, fields=SOURCE_FIELDS, compact=True,
+                                       shards=client.read_shards)
 
-        records.extend(data.get("records", []))
-        offset = data.get("offset")
 
-        if not offset:
-            break
+def normalize(value):
+    """Case- and whitespace-insensitive form of a key value; blanks become None."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def deal_key(fields):
+    """Stable identity of a deal, comparable between source and target rows."""
+    return tuple(normalize(fields.get(name)) for name in MERGE_FIELDS)
+
+
+def build_target_index(table_id, fields, from_snapshot=False):
+    """
+    Read a target table (only the mapped fields), or its snapshot, into
+    {deal_key: (record_id, fields)}. The first row wins when the table
+    already holds duplicates.
+    """
+    index = {}
+    duplicates = 0
+    try:
+        if from_snapshot:
+            records = compact_records(iter_snapshot(snapshot_file(table_id)), fields)
+        else:
+            records = client.iter_records(table_id, fields=fields, compact=True)
+        for record in records:
+            fields_view = record.fields
+            key = deal_key(fields_view)
+            if key in index:
+                duplicates += 1
+            else:
+                index[key] = (record.id, fields_view)
+    except AirtableError as e:
+        print(f"Error indexing {TABLE_NAMES[table_id]}: {e.error}")
+        sys.exit(1)
+
+    print(f"  {TABLE_NAMES[table_id]}: {len(index)} existing deals indexed"
+          + (f" ({duplicates} duplicate rows ignored)" if duplicates else ""))
+    return index
+
+
+def plan_upsert(index, mapped):
+    """
+    Upsert item for a mapped row against the target index, or None when the
+    target already has it with the same values. Updates the index so repeated
+    source rows aren't sent twice.
+    """
+    fields = clean_fields(mapped)
+    key = deal_key(fields)
+    existing = index.get(key)
+
+    if existing is None:
+        index[key] = (None, fields)
+        return {"fields": fields}
+
+    record_id, current = existing
+    if all(current.get(name) == value for name, value in fields.items()):
+        return None
 
-    return records
+    index[key] = (record_id, {**current, **fields})
+    return {"id": record_id, "fields": fields} if record_id else {"fields": fields}
 
 
 def determine_target_table(record):
@@ -102,144 +274,235 @@ def determine_target_table(record):
         return "commercial"
 
 
-def map_to_residential(fields):
-    """Map fields from old schema to Residential Deals schema."""
-    property_type = fields.get("Property Type", "")
-    mapped_property = RESIDENTIAL_PROPERTY_MAP.get(property_type, "Single Family")
-
-    return {
-        "Deal Description": fields.get("Deal Description", ""),
-        "Deal Type": fields.get("Deal Type"),
-        "Deal Value": fields.get("Deal Value"),
-        "Property Type": mapped_property,
-        "Location": fields.get("Location", ""),
-        "Attorney": fields.get("Attorney"),
-        "Client Represented": fields.get("Client Represented"),
-        "Post Status": map_post_status(fields.get("Post Status")),
-        "Post Copy": fields.get("Post Copy", ""),
-        "Notes": fields.get("Notes", ""),
-    }
-
+def report_results(results, journal):
+    """
+    Print batch outcomes from the writer and checkpoint successful batches.
+    Returns descriptions of records in failed batches.
+    """
+    failed = []
 
-def map_to_commercial(fields):
-    """Map fields from old schema to Commercial Deals schema."""
-    property_type = fields.get("Property Type", "")
-    mapped_property = COMMERCIAL_PROPERTY_MAP.get(property_type, "Mixed-Use")
-
-    practice_area = fields.get("Practice Area", "")
-    if not practice_area and fields.get("Deal Type") == "Leasing":
-        practice_area = "Commercial Leasing"
-    elif not practice_area:
-        practice_area = "Commercial Banking"
-
-    # Map deal value to tier
-    deal_value = fields.get("Deal Value", 0) or 0
-    if deal_value >= 5000000:
-        deal_tier = "Enterprise ($5M+)"
-    elif deal_value >= 1000000:
-        deal_tier = "Standard ($1-5M)"
-    else:
-        deal_tier = "Grassroots (<$1M)"
-
-    return {
-        "Deal Description": fields.get("Deal Description", ""),
-        "Deal Type": fields.get("Deal Type"),
-        "Deal Value": fields.get("Deal Value"),
-        "Property Type": mapped_property,
-        "Location": fields.get("Location", ""),
-        "Practice Area": practice_area,
-        "Attorney": fields.get("Attorney"),
-        "Client Represented": fields.get("Client Represented"),
-        "Deal Tier": deal_tier,
-        "Post Status": map_post_status(fields.get("Post Status")),
-        "Post Copy": fields.get("Post Copy", ""),
-        "Notes": fields.get("Notes", ""),
-    }
-
-
-def map_post_status(old_status):
-    """Map old post status to new workflow status."""
-    status_map = {
-        "Raw Info": "Raw Info",
-        "Draft": "Draft",
-        "Ready for Review": "Draft",
-        "Approved": "Ready for Calendar",
-        "Posted": "Posted",
-    }
-    return status_map.get(old_status, "Draft")
-
-
-def create_record(table_id, fields, dry_run=False):
-    """Create a record in the target table."""
-    # Remove None values
-    clean_fields = {k: v for k, v in fields.items() if v is not None and v != ""}
-
-    if dry_run:
-        return {"id": "dry_run", "fields": clean_fields}
+    for result in results:
+        table_name = TABLE_NAMES[result.table_id]
+        if result.error:
+            print(f"  Error writing {table_name} batch: {result.error.error}")
+            # Items are field dicts, or {"id", "fields"} upserts with --upsert
+            failed.extend(item.get("fields", item).get("Deal Description", "?")[:50] for _, item in result.items)
+        else:
+            # Airtable returns created records in request order
+            source_ids = [source_id for source_id, _ in result.items]
+            journal.record_batch(result.table_id, zip(source_ids, (r["id"] for r in result.records)))
+            print(f"  Wrote {len(result.records)} {table_name} records")
+
+    return failed
+
+
+def apply(journal, dead_letters):
+    """Execute the write plan from --plan. Returns descriptions of failed records."""
+    path = plan_path("migrate-deal-posts", client.base_id)
+    if not path.exists():
+        print(f"No write plan at {path}; run with --plan first")
+        sys.exit(1)
+    header = read_plan(path)
+    if header["base"] != client.base_id:
+        print(f"Plan {path} was made for base {header['base']}, not {client.base_id}")
+        sys.exit(1)
+
+    print(f"Applying plan from {header['created_at']} ({path})...")
+    errors = []
+    for _, result in apply_plan(client, path, skip=journal, dead_letter=dead_letters):
+        errors += report_results([result], journal)
+    return errors
 
-    response = requests.post(
-        f"{BASE_URL}/{table_id}",
-        headers=HEADERS,
-        json={"fields": clean_fields}
-    )
 
-    result = response.json()
-    if "error" in result:
-        print(f"  Error creating record: {result['error']}")
-        return None
+def replay(journal):
+    """Resend the dead-lettered rows of earlier runs. Returns descriptions of rows that failed again."""
+    path = DeadLetterLog.for_script("migrate-deal-posts", client.base_id).path
+    if not path.exists():
+        print(f"No dead letters at {path}")
+        return []
 
-    return result
+    print(f"Replaying dead letters from {path}...")
+    errors = []
+    # Creates Airtable may have applied are resent as upserts on the deal key
+    for _, result in replay_dead_letters(client, path, merge_on=MERGE_FIELDS):
+        errors += report_results([result], journal)
+    return errors
 
 
 def main():
     dry_run = "--dry-run" in sys.argv
+    use_mirror = "--mirror" in sys.argv
+    resume = "--resume" in sys.argv
+    upsert = "--upsert" in sys.argv
+    plan_only = "--plan" in sys.argv
+    stage = "apply" if "--apply" in sys.argv else "replay" if "--replay" in sys.argv else None
+
+    # --apply/--replay always write, and need the journal a dry run or plan doesn't open
+    if stage and (dry_run or plan_only):
+        print(f"--{stage} can't be combined with {'--dry-run' if dry_run else '--plan'}")
+        sys.exit(1)
+
+    if "--snapshot" in sys.argv:
+        print("Snapshotting tables...")
+        tables = [(OLD_TABLE_ID, SOURCE_FIELDS)]
+        if upsert:
+            tables += [(table_id, mapper.fields) for table_id, mapper in TARGETS.values()]
+        take_snapshots(tables)
+        client.metrics.emit("migrate-deal-posts-snapshot")
+        return
 
     if dry_run:
         print("=== DRY RUN MODE - No changes will be made ===\n")
 
-    print("Fetching records from Deal Posts...")
-    records = get_all_records(OLD_TABLE_ID)
-    print(f"Found {len(records)} records\n")
-
-    residential_count = 0
-    commercial_count = 0
+    journal = None
+    if resume or not (dry_run or plan_only):
+        # A replay adds to the journal of the run it's completing
+        try:
+            journal = MigrationJournal.for_script("migrate-deal-posts", client.base_id,
+                                                  resume=resume or stage == "replay",
+                                                  fresh="--fresh" in sys.argv)
+        except FileExistsError as e:
+            print(f"{e}; rerun with --resume to continue that run, or --fresh to start a new journal")
+            sys.exit(1)
+    if resume:
+        print(f"Resuming: {len(journal)} records already migrated per {journal.path}\n")
+
+    dead_letters = DeadLetterLog.for_script("migrate-deal-posts", client.base_id)
+
+    if stage:
+        errors = apply(journal, dead_letters) if stage == "apply" else replay(journal)
+        journal.close()
+        dead_letters.close()
+        if errors:
+            print(f"\nErrors: {len(errors)}")
+            for e in errors:
+                print(f"    - {e}")
+            print(f"Rejected rows are in {dead_letters.path}")
+        client.metrics.emit(f"migrate-deal-posts-{stage}", errors=len(errors))
+        return
+
+    indexes = {}
+    if upsert:
+        print("Indexing target tables...")
+        indexes = {target: build_target_index(table_id, mapper.fields, plan_only)
+                   for target, (table_id, mapper) in TARGETS.items()}
+
+    print(f"Streaming records from Deal Posts{' snapshot' if plan_only else ''}...")
+
+    resumed_count = 0
+    unchanged_count = 0
+    updated_count = 0
     errors = []
 
-    for record in records:
-        fields = record.get("fields", {})
-        description = fields.get("Deal Description", "?")[:50]
-        target = determine_target_table(record)
-
-        if target == "residential":
-            mapped = map_to_residential(fields)
-            table_id = RESIDENTIAL_TABLE_ID
-            table_name = "Residential Deals"
-            residential_count += 1
+    # Pages are fetched, mapped and written as a pipeline: each page is routed,
+    # mapped per target table in one call, and the writer sends each table's
+    # 10-record batch as soon as it fills
+    plan = None
+    if plan_only:
+        # Same items as the live writers, recorded in the plan instead of sent
+        plan = WritePlan(plan_path("migrate-deal-posts", client.base_id), "migrate-deal-posts",
+                         client.base_id, [snapshot_path(OLD_TABLE_ID, client.base_id)])
+        if upsert:
+            writer = plan.writer("upsert", keyed=True, merge_on=MERGE_FIELDS)
         else:
-            mapped = map_to_commercial(fields)
-            table_id = COMMERCIAL_TABLE_ID
-            table_name = "Commercial Deals"
-            commercial_count += 1
-
-        print(f"  → {table_name}: {description}...")
-
-        if dry_run:
-            print(f"    Would create with: {list(mapped.keys())}")
-        else:
-            result = create_record(table_id, mapped)
-            if result:
-                print(f"    Created: {result.get('id', '?')}")
-            else:
-                errors.append(description)
+            writer = plan.writer("create", keyed=True)
+    elif upsert:
+        writer = client.upsert_writer(MERGE_FIELDS, keyed=True, dead_letter=dead_letters)
+    else:
+        writer = client.create_writer(keyed=True, dead_letter=dead_letters)
+    quarantine = Quarantine.for_script("migrate-deal-posts", client.base_id)
+    writer = ValidatingWriter(writer, SCHEMAS, quarantine, "upsert" if upsert else "create", keyed=True)
+    invalid_count = 0
+    counts = {target: 0 for target in TARGETS}
+
+    read_error = None
+    try:
+        for page in batched(iter_records(OLD_TABLE_ID, use_mirror, plan_only), MAX_PAGE_SIZE):
+            routed = {target: [] for target in TARGETS}
+            for record in page:
+                if resume and record["id"] in journal:
+                    resumed_count += 1
+                else:
+                    routed[determine_target_table(record)].append(record)
+
+            for target, records in routed.items():
+                table_id, mapper = TARGETS[target]
+                table_name = TABLE_NAMES[table_id]
+                mapped_page = mapper.map_page([record.get("fields", {}) for record in records])
+                counts[target] += len(records)
+
+                for record, mapped in zip(records, mapped_page):
+                    item = mapped
+                    if upsert:
+                        item = plan_upsert(indexes[target], mapped)
+                        if item is None:
+                            unchanged_count += 1
+                            continue
+                        if item.get("id"):
+                            updated_count += 1
+
+                    if plan_only:
+                        writer.add(table_id, (record["id"], item))
+                        continue
+
+                    description = record.get("fields", {}).get("Deal Description", "?")[:50]
+                    print(f"  → {table_name}: {description}...")
+
+                    if dry_run:
+                        action = "update" if upsert and item.get("id") else "create"
+                        print(f"    Would {action} with: {list(mapped.keys())}")
+                        problems = writer.problems(table_id, (record["id"], item))
+                        if problems:
+                            invalid_count += 1
+                            print(f"    ⚠️  Would quarantine: {'; '.join(problems)}")
+                    else:
+                        errors += report_results(writer.add(table_id, (record["id"], item)), journal)
+    except AirtableError as e:
+        read_error = e
+    finally:
+        # Batches already sent must be journaled even when the read fails,
+        # or --resume would create them again
+        errors += report_results(writer.close(), journal)
+        quarantine.close()
+        dead_letters.close()
+        if journal:
+            journal.close()
+
+    if read_error:
+        print(f"Error fetching records: {read_error.error}")
+        if journal:
+            print(f"Records written so far are in {journal.path}; rerun with --resume to continue")
+        sys.exit(1)
+
+    if plan:
+        plan.close()
+        print(f"\nWrote plan to {plan.path}:")
+        for line in plan.summary():
+            print(f"  {line}")
 
     print(f"\n{'=' * 50}")
-    print(f"Migration complete:")
-    print(f"  Residential Deals: {residential_count}")
-    print(f"  Commercial Deals: {commercial_count}")
+    print(f"Migration {'planned' if plan else 'complete'}:")
+    print(f"  Residential Deals: {counts['residential']}")
+    print(f"  Commercial Deals: {counts['commercial']}")
+    if resumed_count:
+        print(f"  Skipped (already in journal): {resumed_count}")
+    if upsert:
+        print(f"  Unchanged (already in target): {unchanged_count}")
+        print(f"  Updated in place: {updated_count}")
+    if quarantine or invalid_count:
+        print(f"  Quarantined (failed validation): {len(quarantine) or invalid_count}"
+              + (f" → {quarantine.path}" if quarantine else ""))
     if errors:
         print(f"  Errors: {len(errors)}")
         for e in errors:
             print(f"    - {e}")
+    if len(dead_letters):
+        print(f"  Dead-lettered: {len(dead_letters)} → {dead_letters.path} (fix, then rerun with --replay)")
+
+    script = "migrate-deal-posts-plan" if plan else "migrate-deal-posts"
+    # A dry run only previews validation, so nothing counts as quarantined
+    client.metrics.emit(script, records=sum(counts.values()) + resumed_count,
+                        errors=len(errors), quarantined=len(quarantine))
 
     if dry_run:
         print("\n=== DRY RUN COMPLETE - Run without --dry-run to apply changes ===")
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Run the Airtable migrations against every client base at once.
+
+Airtable's rate limit is per base, so instead of a serial loop over bases,
+each base gets its own process (and so its own client and rate controller)
+and all bases run concurrently. Within a base the requested scripts run one
+after another so they share that base's budget rather than compete for it.
+
+Bases are listed in a JSON file (see config/airtable-bases.example.json):
+
+    {
+      "bases": [
+        {
+          "name": "acme",
+          "baseId": "appXXXXXXXXXXXXXX",
+          "rateLimit": 5,
+          "tables": {
+            "AIRTABLE_CONTENT_TABLE_ID": "tblXXXXXXXXXXXXXX",
+            "AIRTABLE_DEAL_POSTS_TABLE_ID": "tblXXXXXXXXXXXXXX"
+          }
+        }
+      ]
+    }
+
+"tables" maps the env vars the scripts read to that base's table IDs;
+"apiKey" and "rateLimit" are optional and default to .env / AIRTABLE_RATE_LIMIT.
+
+Run with:
+    python3 migrate-fleet.py --bases bases.json --script migrate-content-calendar -- --dry-run
+    python3 migrate-fleet.py --bases bases.json --script migrate-content-calendar \\
+        --script schedule-content-calendar --only acme,globex
+
+Arguments after "--" are passed to every script. Each script's output goes to
+.cache/fleet/<run>/<base>-<script>.log; progress is printed as runs finish,
+followed by an aggregated report (also saved as report.json in the run
+directory). Records that failed to write or were quarantined come from each
+script's metrics summary (airtable_metrics.py), which the scripts append to
+<base>.metrics.ndjson in the run directory. Exits 1 if any base failed.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dotenv import dotenv_values
+
+automation_dir = pathlib.Path(__file__).resolve().parent
+project_root = automation_dir.parent
+FLEET_DIR = project_root / ".cache" / "fleet"
+
+SCRIPTS = ("migrate-content-calendar", "schedule-content-calendar", "migrate-deal-posts")
+
+# Personal access tokens are also limited to 50 requests/second across all
+# bases. Each client paces RATE_HEADROOM below its base's 5 requests/second,
+# so 10 bases at once stay around 45 requests/second, under the token cap
+DEFAULT_PARALLEL = 10
+
+def load_bases(path, only=None):
+    """Base entries from the fleet file, optionally restricted to some names."""
+    with open(path, encoding="utf-8") as f:
+        bases = json.load(f)["bases"]
+
+    for base in bases:
+        if not base.get("name") or not base.get("baseId"):
+            sys.exit(f"Every base in {path} needs a name and baseId: {base}")
+
+    if only:
+        unknown = set(only) - {base["name"] for base in bases}
+        if unknown:
+            sys.exit(f"Unknown bases: {', '.join(sorted(unknown))}")
+        bases = [base for base in bases if base["name"] in only]
+    return bases
+
+
+def base_env(base, run_dir):
+    """
+    Process environment for one base: the project .env, then the base's own
+    values. The scripts are pointed at an empty env file so they don't load
+    .env over these.
+    """
+    env = dict(os.environ)
+    env.update({k: v for k, v in dotenv_values(project_root / ".env").items() if v is not None})
+    env.update(base.get("tables", {}))
+    env.update({
+        "AIRTABLE_BASE_ID": base["baseId"],
+        "AIRTABLE_ENV_FILE": os.devnull,
+        "AIRTABLE_METRICS_LOG": str(run_dir / f"{base['name']}.metrics.ndjson"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    if base.get("apiKey"):
+        env["AIRTABLE_API_KEY"] = base["apiKey"]
+    if base.get("rateLimit"):
+        env["AIRTABLE_RATE_LIMIT"] = str(base["rateLimit"])
+    return env
+
+
+def last_metrics(path, script):
+    """The latest metrics summary a script emitted, or {}."""
+    if not path.exists():
+        return {}
+    summary = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        entry = json.loads(line)
+        if entry["script"].startswith(script):
+            summary = entry
+    return summary
+
+
+def run_base(base, scripts, script_args, run_dir):
+    """Run the scripts against one base in order. Returns one result dict per script run."""
+    env = base_env(base, run_dir)
+    results = []
+
+    for script in scripts:
+        log_path = run_dir / f"{base['name']}-{script}.log"
+        started = time.monotonic()
+        with open(log_path, "w", encoding="utf-8") as log:
+            status = subprocess.run(
+                [sys.executable, str(automation_dir / f"{script}.py"), *script_args],
+                cwd=automation_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+            ).returncode
+        elapsed = time.monotonic() - started
+
+        metrics = last_metrics(pathlib.Path(env["AIRTABLE_METRICS_LOG"]), script)
+        results.append({
+            "base": base["name"],
+            "base_id": base["baseId"],
+            "script": script,
+            "exit_status": status,
+            "seconds": round(elapsed, 2),
+            "records": metrics.get("records"),
+            "requests": metrics.get("total_requests"),
+            "throttled": metrics.get("throttled"),
+            "retries": metrics.get("retries"),
+            "errors": metrics.get("errors"),
+            "quarantined": metrics.get("quarantined"),
+            "failed_records": (metrics.get("errors") or 0) + (metrics.get("quarantined") or 0),
+            "log": str(log_path),
+        })
+
+        if status:
+            break  # Later scripts may depend on this one
+
+    return results
+
+
+def status(result):
+    if result["exit_status"]:
+        return f"exit {result['exit_status']}"
+    return "partial" if result["failed_records"] else "ok"
+
+
+def print_report(results, elapsed):
+    header = f"{'base':<20}{'script':<26}{'status':>8}{'seconds':>9}{'records':>9}{'requests':>10}{'429s':>6}{'failed':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['base']:<20}{r['script']:<26}{status(r):>8}{r['seconds']:>9}"
+              f"{r['records'] or 0:>9}{r['requests'] or 0:>10}{r['throttled'] or 0:>6}{r['failed_records']:>8}")
+
+    records = sum(r["records"] or 0 for r in results)
+    print("-" * len(header))
+    print(f"{len({r['base'] for r in results})} bases, {records} records in {elapsed:.1f}s"
+          + (f" ({records / elapsed:.0f} records/sec overall)" if elapsed else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Airtable migrations against many bases concurrently")
+    parser.add_argument("--bases", required=True, help="JSON file listing bases and their table IDs")
+    parser.add_argument("--script", action="append", choices=SCRIPTS, required=True,
+                        help="migration to run (repeat to run several, in order, per base)")
+    parser.add_argument("--only", help="comma-separated base names to run")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL, help="bases to run at once")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help="arguments for the scripts, after --")
+    args = parser.parse_args()
+
+    script_args = args.script_args[1:] if args.script_args[:1] == ["--"] else args.script_args
+    bases = load_bases(args.bases, args.only.split(",") if args.only else None)
+    run_dir = FLEET_DIR / datetime.now().strftime("%Y%m%d-%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Running {', '.join(args.script)} against {len(bases)} bases "
+          f"({min(args.parallel, len(bases))} at a time); logs in {run_dir}")
+
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+        futures = {pool.submit(run_base, base, args.script, script_args, run_dir): base for base in bases}
+        for done, future in enumerate(as_completed(futures), 1):
+            base_results = future.result()
+            results += base_results
+            for r in base_results:
+                outcome = status(r)
+                if r["failed_records"]:
+                    outcome += f" ({r['failed_records']} failed records)"
+                if outcome != "ok":
+                    outcome += f", see {r['log']}"
+                print(f"  [{done}/{len(bases)}] {r['base']} {r['script']}: {outcome} in {r['seconds']}s")
+
+    elapsed = time.monotonic() - started
+    results.sort(key=lambda r: (r["base"], SCRIPTS.index(r["script"])))
+    print()
+    print_report(results, elapsed)
+
+    with open(run_dir / "report.json", "w", encoding="utf-8") as f:
+        json.dump({"scripts": args.script, "args": script_args, "seconds": round(elapsed, 2),
+                   "results": results}, f, indent=2)
+
+    failed = [r for r in results if r["exit_status"] or r["failed_records"]]
+    if failed:
+        print(f"\n{len({r['base'] for r in failed})} bases had failures; report in {run_dir / 'report.json'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
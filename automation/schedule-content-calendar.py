@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Content Calendar Scheduling Script
+
+Schedules the reposts migrate-content-calendar.py creates and numbers every
+post per Posting Account + Platform, under the rules in config/airtable.json
+"scheduling" (daily cap and spacing per account, repost delay, pinned
+statuses; see calendar_scheduler.py):
+1. Reads the whole Content Calendar (scheduling fields only)
+2. Moves reposts to at least repostDelayDays after their source, on the next
+   day their lane's rules allow
+3. Renumbers "Queue Position" within each account, platform and day
+4. Sends only the Date / Queue Position values that change, in bulk
+
+Original posts keep their date, and pinned posts (Scheduled, Posted) their
+date and position; days where those alone go over the cap are listed for
+manual review. Posts without a Posting Account or Platform are left alone.
+
+Run with: python3 schedule-content-calendar.py [--dry-run] [--mirror [--prune]]
+
+--mirror reads the table from the local SQLite mirror (airtable_mirror.py),
+refreshing it incrementally first, instead of re-downloading it. Records
+deleted in Airtable are pruned from the mirror every PRUNE_EVERY refreshes
+(a sweep of all record ids); add --prune to sweep now, so none are
+updated again.
+
+Updates are validated against config/airtable.json first (airtable_schema.py)
+and rows Airtable rejects are dead-lettered (airtable_deadletter.py).
+"""
+
+import os
+import sys
+import pathlib
+from dotenv import load_dotenv
+
+from airtable_client import AirtableClient, AirtableError
+from airtable_deadletter import DeadLetterLog
+from airtable_mirror import PRUNE_EVERY, AirtableMirror
+from airtable_schema import Quarantine, ValidatingWriter, load_schema
+from calendar_scheduler import SCHEDULE_FIELDS, Scheduler, load_rules, report_updates
+
+# Load environment variables from project root (override any existing);
+# AIRTABLE_ENV_FILE points at another env file (migrate-fleet.py uses /dev/null)
+project_root = pathlib.Path(__file__).parent.parent
+load_dotenv(os.getenv('AIRTABLE_ENV_FILE', project_root / '.env'), override=True)
+
+TABLE_ID = os.getenv('AIRTABLE_CONTENT_TABLE_ID', 'YOUR_CONTENT_TABLE_ID')
+
+client = AirtableClient.from_env()
+
+SCHEMAS = {TABLE_ID: load_schema("contentCalendar")}
+
+
+def read_records(use_mirror=False):
+    """All Content Calendar records as compact records with the scheduling fields."""
+    try:
+        if use_mirror:
+            with AirtableMirror(client) as mirror:
+                changed = mirror.refresh(TABLE_ID, prune="--prune" in sys.argv, prune_every=PRUNE_EVERY)
+                print(f"Mirror refreshed ({changed} changed records)")
+                return list(mirror.records(TABLE_ID, fields=SCHEDULE_FIELDS, compact=True))
+        return list(client.iter_records(TABLE_ID, fields=SCHEDULE_FIELDS, compact=True,
+                                        shards=client.read_shards))
+    except AirtableError as e:
+        print(f"Error fetching records: {e.error}")
+        sys.exit(1)
+
+
+def main():
+    dry_run = "--dry-run" in sys.argv
+    use_mirror = "--mirror" in sys.argv
+
+    if dry_run:
+        print("=== DRY RUN MODE - No changes will be made ===\n")
+
+    print("Reading Content Calendar...")
+    records = read_records(use_mirror)
+    scheduler = Scheduler(load_rules())
+    updates = scheduler.changes(records)
+    moved = sum("Date" in u["fields"] for u in updates)
+    print(f"Scheduled {len(records)} posts across {len(scheduler.lanes)} account/platform lanes")
+
+    if scheduler.over_cap:
+        print(f"\n⚠️  {len(scheduler.over_cap)} days have more original or pinned posts than the daily cap:")
+        for (account, platform), day in sorted(scheduler.over_cap, key=lambda o: (str(o[0]), o[1])):
+            print(f"  {day}: {account} / {platform}")
+
+    if dry_run:
+        for update in updates[:20]:  # Show first 20
+            print(f"  Would update {update['id']}: {update['fields']}")
+        if len(updates) > 20:
+            print(f"  ... and {len(updates) - 20} more")
+        print(f"\nWould update {len(updates)} posts ({moved} date changes)")
+        print("\n=== DRY RUN COMPLETE - Run without --dry-run to apply changes ===")
+        return
+
+    dead_letters = DeadLetterLog.for_script("schedule-content-calendar", client.base_id)
+    quarantine = Quarantine.for_script("schedule-content-calendar", client.base_id)
+    writer = ValidatingWriter(client.update_writer(dead_letter=dead_letters), SCHEMAS, quarantine, "update")
+
+    updated = 0
+    failed = []
+    for update in updates:
+        count, errors = report_updates(writer.add(TABLE_ID, update))
+        updated += count
+        failed += errors
+    count, errors = report_updates(writer.close())
+    updated += count
+    failed += errors
+    quarantine.close()
+    dead_letters.close()
+
+    print(f"\nScheduling complete:")
+    print(f"  Updated: {updated} ({moved} date changes)")
+    print(f"  Unchanged: {len(records) - len(updates)}")
+    if failed:
+        print(f"  Failed: {len(failed)}")
+    if quarantine:
+        print(f"  Quarantined (failed validation): {len(quarantine)} → {quarantine.path}")
+    if len(dead_letters):
+        print(f"  Dead-lettered: {len(dead_letters)} → {dead_letters.path} (fix, then rerun)")
+
+    client.metrics.emit("schedule-content-calendar", records=len(records),
+                        errors=len(failed), quarantined=len(quarantine))
+
+
+if __name__ == "__main__":
+    main()
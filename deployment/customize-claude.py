@@ -4,12 +4,24 @@ Marketing Engine CLAUDE.md Customization Script
 Generates client-specific CLAUDE.md from template using client configuration
 """
 
+import argparse
+import glob
+import hashlib
 import json
 import sys
 import os
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Set, Tuple
 import re
 
+# {{VARIABLE}} placeholders; split() on this yields literal/name segments
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Za-z0-9_]+)\}\}")
+
+# Render cache: per-output input hash and content hash, plus what the last run regenerated
+RENDER_MANIFEST = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'render-manifest.json'))
+RENDER_STATUSES = ('written', 'unchanged', 'cached')
+
 def load_client_config(config_path: str) -> Dict[str, Any]:
     """Load and parse client configuration JSON"""
     try:
@@ -22,9 +34,9 @@ def load_client_config(config_path: str) -> Dict[str, Any]:
         print(f"Error: Invalid JSON in configuration file: {e}")
         sys.exit(1)
 
-def load_template() -> str:
+def load_template(template_path: Optional[str] = None) -> str:
     """Load the CLAUDE.md template"""
-    template_path = os.path.join(os.path.dirname(__file__), '..', 'CLAUDE-template.md')
+    template_path = template_path or os.path.join(os.path.dirname(__file__), '..', 'CLAUDE-template.md')
     try:
         with open(template_path, 'r', encoding='utf-8') as f:
             return f.read()
@@ -137,16 +149,34 @@ def create_substitution_map(config: Dict[str, Any]) -> Dict[str, str]:
 
     return substitutions
 
-def apply_substitutions(template: str, substitutions: Dict[str, str]) -> str:
-    """Apply variable substitutions to template"""
-    content = template
-
-    # Replace all {{VARIABLE}} patterns
-    for key, value in substitutions.items():
-        pattern = f"{{{{{key}}}}}"
-        content = content.replace(pattern, str(value))
-
-    return content
+def compile_template(template: str) -> List[str]:
+    """Split the template once into segments: even indexes are literal text, odd are variable names"""
+    return PLACEHOLDER_PATTERN.split(template)
+
+def render_template(segments: List[str], substitutions: Dict[str, str]) -> Tuple[str, Set[str]]:
+    """Render compiled segments in one pass. Returns (content, placeholders with no value)"""
+    parts = []
+    unfilled = set()
+
+    for i, segment in enumerate(segments):
+        if i % 2 == 0:
+            parts.append(segment)
+        elif segment in substitutions:
+            parts.append(str(substitutions[segment]))
+        else:
+            # Leave unknown placeholders visible in the output
+            unfilled.add(segment)
+            parts.append(f"{{{{{segment}}}}}")
+
+    return ''.join(parts), unfilled
+
+def report_placeholders(entry: Dict[str, Any], output_file: Optional[str] = None, verbose: bool = False) -> None:
+    """Warn about template placeholders with no value; with `verbose`, also note values the template never uses"""
+    indent, where = ("   ", f"{output_file}: ") if output_file else ("", "")
+    if entry['unfilled']:
+        print(f"{indent}Warning: {where}unfilled placeholders in template: {', '.join(entry['unfilled'])}")
+    if verbose and entry.get('unused'):
+        print(f"{indent}Note: {where}{entry['unused']} substitution values not used by this template")
 
 def generate_seasonal_calendar(config: Dict[str, Any]) -> str:
     """Generate seasonal calendar content based on industry"""
@@ -178,36 +208,221 @@ def generate_seasonal_calendar(config: Dict[str, Any]) -> str:
 
     return '\n'.join([f"- {item}" for item in seasonal_calendar])
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 customize-claude.py <config-file> <output-file>")
-        sys.exit(1)
+def build_substitutions(config: Dict[str, Any]) -> Dict[str, str]:
+    """Full substitution map for a client, including the seasonal calendar"""
+    substitutions = create_substitution_map(config)
+    substitutions['SEASONAL_CALENDAR'] = generate_seasonal_calendar(config)
+    return substitutions
 
-    config_file = sys.argv[1]
-    output_file = sys.argv[2]
+def write_output(output_file: str, content: str) -> None:
+    """Write rendered content, creating the parent directory if needed"""
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def template_fingerprint(template: str) -> str:
+    """Hash of the template and this script, so editing either invalidates every cached render"""
+    digest = hashlib.sha256(template.encode('utf-8'))
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def render_key(fingerprint: str, config: Dict[str, Any]) -> str:
+    """Cache key for one client: template/script fingerprint plus the canonical config"""
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{fingerprint}\n{canonical}".encode('utf-8')).hexdigest()
+
+def file_digest(path: str) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it doesn't exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
 
-    # Load configuration and template
-    config = load_client_config(config_file)
-    template = load_template()
+def load_render_manifest() -> Dict[str, Any]:
+    """Load the render cache manifest, starting fresh if it is missing or unreadable"""
+    try:
+        with open(RENDER_MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'outputs': {}}
+
+def save_render_manifest(manifest: Dict[str, Any], results: List[Tuple[str, str]]) -> None:
+    """Record this run's (output, status) results and write the manifest atomically"""
+    manifest['last_run'] = {
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        **{status: sorted(out for out, s in results if s == status) for status in RENDER_STATUSES},
+    }
+    os.makedirs(os.path.dirname(RENDER_MANIFEST), exist_ok=True)
+    tmp = RENDER_MANIFEST + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, RENDER_MANIFEST)
+
+def render_cached(config: Dict[str, Any], output_file: str, segments: List[str], fingerprint: str,
+                  cached: Optional[Dict[str, Any]], force: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render one client unless the cache shows its output is already current.
+
+    Returns (status, manifest entry). Status is 'cached' when the inputs and the
+    file on disk both match the manifest (nothing rendered), 'unchanged' when the
+    render is byte-identical to the existing file (not rewritten), else 'written'.
+    """
+    key = render_key(fingerprint, config)
+    current = file_digest(output_file)
+    if not force and cached and current and cached.get('key') == key and cached.get('sha256') == current:
+        return 'cached', cached
+
+    substitutions = build_substitutions(config)
+    content, unfilled = render_template(segments, substitutions)
+    rendered = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    if rendered == current:
+        status = 'unchanged'
+    else:
+        write_output(output_file, content)
+        status = 'written'
+    unused = len(set(substitutions) - set(segments[1::2]))
+    return status, {'key': key, 'sha256': rendered, 'unfilled': sorted(unfilled), 'unused': unused}
+
+# Compiled template for batch workers, set once per process by init_worker
+_worker_segments: List[str] = []
+_worker_fingerprint = ''
+
+def init_worker(segments: List[str], fingerprint: str) -> None:
+    """Process pool initializer: receive the compiled template once per worker"""
+    global _worker_segments, _worker_fingerprint
+    _worker_segments = segments
+    _worker_fingerprint = fingerprint
+
+def render_client(config_file: str, output_file: str, cached: Optional[Dict[str, Any]],
+                  force: bool) -> Tuple[str, Dict[str, Any]]:
+    """Render one client in a batch worker. Raises instead of exiting so one bad config doesn't stop the batch"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return render_cached(config, output_file, _worker_segments, _worker_fingerprint, cached, force)
+
+def load_batch(source: str, output_dir: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    Resolve a batch source to (config, output) pairs.
+
+    A .json file is a manifest: a list of {"config": ..., "output": ...} entries.
+    Anything else is a glob of client configs; each output is CLAUDE.md next to
+    its config, or under output_dir mirroring the configs' relative layout.
+    """
+    if source.endswith('.json') and os.path.isfile(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            return [(entry['config'], entry['output']) for entry in json.load(f)]
+
+    configs = sorted(glob.glob(source, recursive=True))
+    if not configs:
+        return []
+    if not output_dir:
+        return [(c, os.path.join(os.path.dirname(c), 'CLAUDE.md')) for c in configs]
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(c)) for c in configs])
+    return [(c, os.path.normpath(os.path.join(output_dir, os.path.relpath(os.path.dirname(os.path.abspath(c)), root), 'CLAUDE.md')))
+            for c in configs]
+
+def run_batch(jobs: List[Tuple[str, str]], segments: List[str], fingerprint: str,
+              workers: int, force: bool, verbose: bool = False) -> int:
+    """Render all jobs across a process pool, updating the render manifest. Returns the number of failures"""
+    manifest = load_render_manifest()
+    outputs = manifest.setdefault('outputs', {})
+    results = []
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(segments, fingerprint)) as pool:
+        futures = {
+            pool.submit(render_client, config, output, outputs.get(os.path.abspath(output)), force): (config, output)
+            for config, output in jobs
+        }
+        for future in as_completed(futures):
+            config_file, output_file = futures[future]
+            try:
+                status, entry = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"❌ {config_file}: {e}")
+                continue
+
+            outputs[os.path.abspath(output_file)] = entry
+            results.append((os.path.abspath(output_file), status))
+            if status == 'written':
+                print(f"✅ {output_file}")
+            if status != 'cached':
+                report_placeholders(entry, output_file, verbose)
+
+    save_render_manifest(manifest, results)
+    counts = {status: sum(1 for _, s in results if s == status) for status in RENDER_STATUSES}
+    print(f"\n{len(results)}/{len(jobs)} clients rendered: {counts['written']} written, "
+          f"{counts['unchanged']} unchanged, {counts['cached']} cached")
+    return failures
 
-    # Create substitutions
-    substitutions = create_substitution_map(config)
+def main():
+    parser = argparse.ArgumentParser(description="Generate client-specific CLAUDE.md files from the template")
+    parser.add_argument('config_file', nargs='?', help="client configuration JSON")
+    parser.add_argument('output_file', nargs='?', help="where to write the customized CLAUDE.md")
+    parser.add_argument('--batch', metavar='MANIFEST_OR_GLOB',
+                        help="render many clients: a manifest .json of {config, output} entries, "
+                             "or a glob such as 'config/examples/**/client.config.json'")
+    parser.add_argument('--output-dir', help="batch glob mode: write outputs here instead of next to each config")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="batch mode: worker processes")
+    parser.add_argument('--template', help="template path (default: CLAUDE-template.md in the project root)")
+    parser.add_argument('--force', action='store_true', help="ignore the render cache and re-render every output")
+    parser.add_argument('--verbose', action='store_true', help="also report substitution values the template doesn't use")
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.config_file or args.output_file:
+            parser.error("--batch does not take <config-file> <output-file>")
+        jobs = load_batch(args.batch, args.output_dir)
+        if not jobs:
+            print(f"Error: No client configurations matched: {args.batch}")
+            sys.exit(1)
+
+        # Read and compile the template once for the whole fleet
+        template = load_template(args.template)
+        segments = compile_template(template)
+        print(f"Rendering {len(jobs)} clients with {min(args.workers, len(jobs))} workers...")
+        if run_batch(jobs, segments, template_fingerprint(template), args.workers, args.force, args.verbose):
+            sys.exit(1)
+        return
+
+    if not (args.config_file and args.output_file):
+        parser.error("expected <config-file> <output-file>, or --batch")
+
+    config_file = args.config_file
+    output_file = args.output_file
 
-    # Add seasonal calendar
-    substitutions['SEASONAL_CALENDAR'] = generate_seasonal_calendar(config)
+    # Load configuration and template
+    config = load_client_config(config_file)
+    template = load_template(args.template)
 
-    # Apply substitutions
-    customized_content = apply_substitutions(template, substitutions)
+    manifest = load_render_manifest()
+    outputs = manifest.setdefault('outputs', {})
+    key = os.path.abspath(output_file)
 
-    # Write output
+    # Render and write, skipping both when the cache shows the output is current
     try:
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(customized_content)
-        print(f"✅ Customized CLAUDE.md created: {output_file}")
+        status, entry = render_cached(config, output_file, compile_template(template),
+                                      template_fingerprint(template), outputs.get(key), args.force)
     except Exception as e:
         print(f"Error writing output file: {e}")
         sys.exit(1)
 
+    outputs[key] = entry
+    save_render_manifest(manifest, [(key, status)])
+
+    if status != 'cached':
+        report_placeholders(entry, verbose=args.verbose)
+    if status == 'written':
+        print(f"✅ Customized CLAUDE.md created: {output_file}")
+    else:
+        print(f"✅ CLAUDE.md already up to date: {output_file}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()